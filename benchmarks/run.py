@@ -0,0 +1,313 @@
+"""Performance benchmarks for page reruns, charts and export.
+
+Page timings drive ``streamlit_app.py`` through Streamlit's ``AppTest``
+harness. Everything else calls the ``budget`` functions directly. Each
+benchmark runs with 0, 10, 100 and 1,000 entries in both
+``additional_expenses`` and ``savings_goals`` (``--sizes`` overrides this) and
+records the median of ``--repeat`` runs.
+
+Results are written as JSON. With ``--baseline``, every timing is compared
+against a previous results file, and the run exits 1 when any of them is
+slower by more than ``--threshold`` (a fraction, default 0.25)::
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline bench.json --output bench-new.json
+
+``AppTest`` always executes the whole script, so the edit timings are an
+upper bound for the tab fragments a browser session reruns.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from budget import allocation, altair_charts, engine, export, graph, roster, state, tax  # noqa: E402
+
+APP = ROOT / "streamlit_app.py"
+SIZES = (0, 10, 100, 1000)
+TABS = ("Income", "Expenses", "Savings Goals", "Visuals & Export")
+TAX_ROWS = 1_000_000
+BUDGET_ROWS = 100_000
+ALLOCATION_HOUSEHOLDS = 1000
+ALLOCATION_GOALS = 300
+# Timings this short are mostly noise, so they never count as regressions.
+MIN_REGRESSION_SECONDS = 0.002
+
+
+def sample_lists(size):
+    additional_expenses = [{"Expense": f"Expense {i}", "Amount": 10.0 + i % 90} for i in range(size)]
+    savings_goals = [
+        {"Goal": f"Goal {i}", "Target": 1000.0 + 10 * i, "Monthly": 50.0, "Months": (1000.0 + 10 * i) / 50.0}
+        for i in range(size)
+    ]
+    return additional_expenses, savings_goals
+
+
+def median_seconds(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def _app(size, tab):
+    from streamlit.testing.v1 import AppTest
+
+    additional_expenses, savings_goals = sample_lists(size)
+    app = AppTest.from_file(str(APP), default_timeout=600)
+    app.session_state["additional_expenses"] = additional_expenses
+    app.session_state["savings_goals"] = savings_goals
+    app.session_state["active_tab"] = tab
+    app.run()
+    if app.exception:
+        raise RuntimeError(f"{tab} raised: {app.exception[0].message}")
+    return app
+
+
+def _rerun(app, tab):
+    # AppTest resets the tab widget on interaction, so select it every run.
+    app.session_state["active_tab"] = tab
+    app.run()
+
+
+def _edit(app, tab, step):
+    if tab == "Income":
+        app.number_input(key="gross_income").set_value(5000.0 + step)
+    elif tab == "Expenses":
+        app.number_input(key="home").set_value(1400.0 + step)
+    elif tab == "Savings Goals":
+        # Submit the add form so every step appends a goal and redraws the grid.
+        app.text_input(key="goal_name").set_value(f"Goal {step}")
+        app.number_input(key="goal_target").set_value(60.0 + step)
+        app.number_input(key="goal_monthly").set_value(5.0)
+        next(button for button in app.button if button.label == "Add Savings Goal").click()
+    else:
+        app.selectbox(key="filing_status").set_value(engine.FILING_STATUSES[step % len(engine.FILING_STATUSES)])
+    _rerun(app, tab)
+
+
+def bench_page(size, repeat):
+    results = {}
+    for tab in TABS:
+        app = _app(size, tab)
+        results[f"rerun/{tab}"] = median_seconds(lambda: _rerun(app, tab), repeat)
+        steps = iter(range(1, repeat + 1))
+        results[f"edit/{tab}"] = median_seconds(lambda: _edit(app, tab, next(steps)), repeat)
+    return results
+
+
+def bench_tax(repeat):
+    rng = np.random.default_rng(0)
+    incomes = rng.uniform(0, 1_000_000, TAX_ROWS)
+    statuses = rng.choice(engine.FILING_STATUSES, TAX_ROWS)
+    seconds = median_seconds(lambda: tax.federal_tax(incomes, statuses), repeat)
+    households = pd.DataFrame({
+        "gross_income": rng.uniform(1000, 30000, BUDGET_ROWS),
+        "federal_withholding_percent": rng.uniform(0, 30, BUDGET_ROWS),
+        "state_withholding_percent": rng.uniform(0, 8, BUDGET_ROWS),
+        "home": rng.uniform(0, 4000, BUDGET_ROWS),
+        "filing_status": rng.choice(engine.FILING_STATUSES, BUDGET_ROWS),
+    })
+    budget_seconds = median_seconds(lambda: engine.compute_budget(households), repeat)
+    scalar_seconds = median_seconds(lambda: tax.federal_tax(85000.0, "Single"), repeat * 100)
+    states = np.array(tax.state_table().states, dtype=object)
+    household_states = rng.choice(states, BUDGET_ROWS)
+    state_seconds = median_seconds(
+        lambda: tax.state_tax(incomes[:BUDGET_ROWS], household_states, statuses[:BUDGET_ROWS]), repeat
+    )
+    all_states_seconds = median_seconds(lambda: tax.state_tax(85000.0, states, "Single"), repeat * 100)
+    return (
+        {
+            "federal_tax/1M rows": seconds,
+            "federal_tax/scalar": scalar_seconds,
+            "state_tax/100k rows": state_seconds,
+            "state_tax/all states": all_states_seconds,
+            "compute_budget/100k rows": budget_seconds,
+        },
+        {
+            "federal_tax_rows_per_second": TAX_ROWS / seconds,
+            "compute_budget_rows_per_second": BUDGET_ROWS / budget_seconds,
+        },
+    )
+
+
+def _figures_and_frame(size):
+    additional_expenses, savings_goals = sample_lists(size)
+    record = {
+        "inputs": dict(state.INPUT_DEFAULTS),
+        "additional_expenses": additional_expenses,
+        "savings_goals": savings_goals,
+    }
+    model = graph.budget_graph(state.graph_inputs(record))
+    figures = model.values()
+    frame = export.export_frame(figures, [], additional_expenses, savings_goals)
+    return model, figures, frame, additional_expenses, savings_goals
+
+
+def bench_allocation(repeat):
+    rng = np.random.default_rng(0)
+    shape = (ALLOCATION_HOUSEHOLDS, ALLOCATION_GOALS)
+    targets = rng.uniform(100, 50_000, shape)
+    deadlines = np.where(rng.random(shape) < 0.5, rng.integers(1, 120, shape), np.nan)
+    priorities = rng.integers(1, 4, shape)
+    surplus = rng.uniform(0, 20_000, ALLOCATION_HOUSEHOLDS)
+    seconds = median_seconds(lambda: allocation.allocate(surplus, targets, deadlines, priorities), repeat)
+    single_seconds = median_seconds(
+        lambda: allocation.allocate(surplus[0], targets[0], deadlines[0], priorities[0]), repeat * 100
+    )
+    return {
+        f"allocate/{ALLOCATION_HOUSEHOLDS}x{ALLOCATION_GOALS}": seconds,
+        f"allocate/1x{ALLOCATION_GOALS}": single_seconds,
+    }
+
+
+def bench_roster(repeat):
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "employee_id": [f"E{i:06d}" for i in range(BUDGET_ROWS)],
+        "gross_income": rng.uniform(1000, 30000, BUDGET_ROWS).round(2),
+        "federal_withholding_percent": rng.uniform(0, 30, BUDGET_ROWS).round(2),
+        "state_withholding_percent": rng.uniform(0, 8, BUDGET_ROWS).round(2),
+        "home": rng.uniform(0, 4000, BUDGET_ROWS).round(2),
+        "filing_status": rng.choice(engine.FILING_STATUSES, BUDGET_ROWS),
+        "residence_state": rng.choice(tax.state_table().states, BUDGET_ROWS),
+    })
+    data = frame.to_csv(index=False).encode("utf-8")
+
+    def load():
+        roster.cohort_cache.clear()
+        return roster.load_cohort(data, "roster.csv")
+
+    def summarize():
+        roster.summary_cache.clear()
+        roster.summarize(cohort, "surplus", ("Single",))
+
+    seconds = median_seconds(load, repeat)
+    cohort = load()
+    return {
+        "roster/load 100k rows": seconds,
+        "roster/summarize": median_seconds(summarize, repeat),
+        "roster/cached summary": median_seconds(lambda: roster.summarize(cohort, "surplus", ("Single",)), repeat),
+    }
+
+
+def bench_charts_and_export(size, repeat):
+    from streamlit.dataframe_util import convert_pandas_df_to_arrow_bytes
+
+    model, figures, frame, additional_expenses, savings_goals = _figures_and_frame(size)
+    distribution = export.budget_distribution(figures)
+    categories, amounts = export.expense_breakdown(figures, additional_expenses)
+    goal_args = (
+        [goal["Goal"] for goal in savings_goals],
+        [goal["Monthly"] for goal in savings_goals],
+        [goal["Months"] for goal in savings_goals],
+    )
+
+    def screen_charts():
+        altair_charts.budget_distribution_chart(distribution).to_dict()
+        altair_charts.expense_breakdown_chart(categories, amounts).to_dict()
+        if savings_goals:
+            altair_charts.savings_goals_chart(*goal_args).to_dict()
+
+    annual_tax = model.values(export.WORKBOOK_TAX_FIELDS)
+    workbook = export.to_excel(frame, figures["filing_status"], annual_tax, savings_goals)
+    results = {
+        "charts/altair": median_seconds(screen_charts, repeat),
+        "to_excel": median_seconds(
+            lambda: export.to_excel(frame, figures["filing_status"], annual_tax, savings_goals), repeat
+        ),
+        "preview": median_seconds(lambda: convert_pandas_df_to_arrow_bytes(export.preview(frame)), repeat),
+    }
+    return results, {"to_excel_bytes": len(workbook), "export_rows": len(frame)}
+
+
+def run(sizes=SIZES, repeat=3, include_page=True):
+    timings = {}
+    metrics = {}
+    tax_timings, tax_metrics = bench_tax(repeat)
+    timings.update(tax_timings)
+    metrics.update(tax_metrics)
+    timings.update(bench_allocation(repeat))
+    timings.update(bench_roster(repeat))
+    for size in sizes:
+        size_timings, size_metrics = bench_charts_and_export(size, repeat)
+        if include_page:
+            size_timings.update(bench_page(size, repeat))
+        timings.update({f"{name}@{size}": seconds for name, seconds in size_timings.items()})
+        metrics.update({f"{name}@{size}": value for name, value in size_metrics.items()})
+        print(f"size {size}: done", file=sys.stderr)
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "repeat": repeat,
+        "sizes": list(sizes),
+        "seconds": timings,
+        "metrics": metrics,
+    }
+
+
+def compare(results, baseline, threshold):
+    """``(name, baseline, current, ratio, regressed)`` for timings in both runs."""
+    rows = []
+    for name, seconds in results["seconds"].items():
+        before = baseline.get("seconds", {}).get(name)
+        if before is None:
+            continue
+        ratio = seconds / before if before else float("inf")
+        regressed = ratio > 1.0 + threshold and seconds - before > MIN_REGRESSION_SECONDS
+        rows.append((name, before, seconds, ratio, regressed))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown as a fraction")
+    parser.add_argument("--skip-page", action="store_true", help="skip the AppTest page timings")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, include_page=not args.skip_page)
+    for name, seconds in results["seconds"].items():
+        print(f"{seconds * 1000:12.2f} ms  {name}")
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        rows = compare(results, baseline, args.threshold)
+        results["baseline"] = {"path": args.baseline, "created": baseline.get("created"), "threshold": args.threshold}
+        results["comparison"] = [
+            {"name": name, "baseline": before, "current": current, "ratio": ratio, "regressed": regressed}
+            for name, before, current, ratio, regressed in rows
+        ]
+        regressions = [row for row in rows if row[4]]
+        for name, before, current, ratio, _ in regressions:
+            print(
+                f"REGRESSION {name}: {before * 1000:.2f} ms -> {current * 1000:.2f} ms ({ratio:.2f}x)",
+                file=sys.stderr
+            )
+        print(f"{len(rows)} timings compared, {len(regressions)} regressions (threshold {args.threshold:.0%})")
+        exit_code = 1 if regressions else 0
+
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(results, handle, indent=2)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
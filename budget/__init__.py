@@ -0,0 +1 @@
+"""Calculation helpers behind the Budgetary Tool Streamlit app."""
@@ -0,0 +1,97 @@
+"""Split a monthly surplus across savings goals.
+
+A goal with a deadline (in months) needs ``target / deadline`` a month. Goals
+are funded in priority order (1 first), earlier deadlines first within a
+priority, each getting its full requirement until the surplus runs out; the
+goal where it runs out gets the remainder and later ones nothing. Whatever is
+left after every deadline is met goes to the goals without a deadline, in
+proportion to their targets, so they finish in the same month. No goal gets
+more than its target in a month; surplus beyond that stays unallocated, as do
+leftovers under a cent.
+
+Because every goal draws on one budget, filling requirements in order is
+exact for this problem (it is a fractional knapsack), so no solver is
+needed. Arrays have one row per household and one column per goal; a
+household with fewer goals pads its row with ``NaN`` targets.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PRIORITY = 1
+# Leftover surplus below this is rounding residue, not money to share out.
+MIN_LEFTOVER = 0.01
+
+
+@dataclass(frozen=True)
+class Allocation:
+    monthly: np.ndarray
+    months: np.ndarray
+    on_schedule: np.ndarray
+    unallocated: np.ndarray
+
+    def table(self, names):
+        """One household's allocation as a table, one row per goal."""
+        return pd.DataFrame({
+            "Goal": list(names),
+            "Monthly": self.monthly,
+            "Months": self.months,
+            "On schedule": self.on_schedule,
+        })
+
+
+def allocate(surplus, targets, deadlines=None, priorities=None):
+    """Monthly contribution per goal that fits within ``surplus``.
+
+    ``targets``, ``deadlines`` and ``priorities`` have goals along the last
+    axis; ``surplus`` has one value per household. A deadline of 0 or
+    ``NaN`` means none, and priorities default to ``DEFAULT_PRIORITY``.
+    Returns an ``Allocation`` whose ``on_schedule`` is false for goals that
+    cannot meet their deadline, and whose ``unallocated`` is surplus that
+    no goal can take: nothing lacks a deadline, or every goal already gets
+    its whole target each month.
+    """
+    targets = np.asarray(targets, dtype=float)
+    surplus = np.maximum(np.asarray(surplus, dtype=float), 0.0)
+    deadlines = np.broadcast_to(
+        np.nan if deadlines is None else np.asarray(deadlines, dtype=float), targets.shape
+    )
+    priorities = np.broadcast_to(
+        DEFAULT_PRIORITY if priorities is None else np.asarray(priorities, dtype=float), targets.shape
+    )
+    active = np.isfinite(targets) & (targets > 0)
+    has_deadline = active & np.isfinite(deadlines) & (deadlines > 0)
+    open_ended = active & ~has_deadline
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        required = np.where(has_deadline, np.minimum(targets / deadlines, targets), 0.0)
+
+    # Fill requirements in (priority, deadline, position) order per household.
+    positions = np.broadcast_to(np.arange(targets.shape[-1]), targets.shape)
+    order = np.lexsort((positions, np.where(has_deadline, deadlines, np.inf), priorities), axis=-1)
+    required_in_order = np.take_along_axis(required, order, axis=-1)
+    funded_before = np.cumsum(required_in_order, axis=-1) - required_in_order
+    funded_in_order = np.clip(surplus[..., None] - funded_before, 0.0, required_in_order)
+    monthly = np.empty_like(required)
+    np.put_along_axis(monthly, order, funded_in_order, axis=-1)
+
+    leftover = surplus - monthly.sum(axis=-1)
+    leftover = np.where(leftover < MIN_LEFTOVER, 0.0, leftover)
+    open_targets = np.where(open_ended, targets, 0.0)
+    open_total = open_targets.sum(axis=-1)
+    # Shares are proportional to targets, so capping the total at open_total
+    # caps every goal at its own target.
+    shared = np.minimum(leftover, open_total)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(open_total[..., None] > 0, open_targets / open_total[..., None], 0.0)
+        monthly = monthly + share * shared[..., None]
+        months = np.where(active & (monthly > 0), targets / monthly, np.inf)
+    unallocated = leftover - shared
+    on_schedule = ~has_deadline | (monthly >= required * (1 - 1e-12))
+    return Allocation(
+        np.where(active, monthly, 0.0),
+        np.where(active, months, np.nan),
+        on_schedule & active,
+        unallocated,
+    )
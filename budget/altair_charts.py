@@ -0,0 +1,114 @@
+"""Vega-Lite chart specs for the page, drawn by the browser.
+
+Building a spec only serializes the plotted values, so reruns cost no
+server-side rasterization. Colors and titles match the workbook's native
+Excel charts.
+"""
+import altair as alt
+import pandas as pd
+
+from budget.charts import (
+    BUDGET_DISTRIBUTION_COLORS,
+    BUDGET_DISTRIBUTION_LABELS,
+    EXPENSE_BREAKDOWN_COLORS,
+    SAVINGS_GOALS_COLORS,
+)
+
+PIE_RADIUS = 110
+
+
+def _pie(labels, values, colors, title):
+    frame = pd.DataFrame({"Category": list(labels), "Amount": [float(value) for value in values]})
+    frame["Position"] = range(len(frame))
+    total = frame["Amount"].sum()
+    frame["Share"] = frame["Amount"] / total if total else 0.0
+    frame["Label"] = [f"${amount:,.0f} ({share:.1%})" for amount, share in zip(frame["Amount"], frame["Share"])]
+
+    base = alt.Chart(frame, title=title).encode(
+        theta=alt.Theta("Amount:Q", stack=True),
+        order=alt.Order("Position:Q"),
+        color=alt.Color(
+            "Category:N",
+            sort=list(frame["Category"]),
+            scale=alt.Scale(domain=list(frame["Category"]), range=list(colors)),
+            legend=alt.Legend(title=None, orient="bottom", columns=2)
+        ),
+        tooltip=[
+            alt.Tooltip("Category:N"),
+            alt.Tooltip("Amount:Q", format="$,.2f"),
+            alt.Tooltip("Share:Q", format=".1%")
+        ]
+    )
+    slices = base.mark_arc(outerRadius=PIE_RADIUS, stroke="white", strokeWidth=2)
+    labels = base.mark_text(radius=PIE_RADIUS + 30, fontSize=11, fontWeight="bold").encode(text="Label:N")
+    return (slices + labels).properties(height=2 * PIE_RADIUS + 120)
+
+
+def budget_distribution_chart(values):
+    """Pie of income, expenses, savings allocation and remaining surplus."""
+    return _pie(BUDGET_DISTRIBUTION_LABELS, values, BUDGET_DISTRIBUTION_COLORS, "Budget Distribution")
+
+
+def expense_breakdown_chart(categories, amounts):
+    """Pie of the largest expense categories."""
+    return _pie(
+        categories,
+        amounts,
+        EXPENSE_BREAKDOWN_COLORS[:len(categories)],
+        "Where Your Money Goes (Top 5)"
+    )
+
+
+def savings_goals_chart(names, amounts, months):
+    """Bar chart of monthly contributions and months to reach each goal."""
+    frame = pd.DataFrame({
+        "Goal": list(names),
+        "Monthly": [float(amount) for amount in amounts],
+        "Months": [float(goal_months) for goal_months in months]
+    })
+    frame["Label"] = [
+        f"${amount:,.2f}/mo, {goal_months:.1f} months"
+        for amount, goal_months in zip(frame["Monthly"], frame["Months"])
+    ]
+    colors = [SAVINGS_GOALS_COLORS[i % len(SAVINGS_GOALS_COLORS)] for i in range(len(frame))]
+
+    base = alt.Chart(frame, title="Monthly Savings Contributions").encode(
+        x=alt.X("Goal:N", sort=None, title=None, axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y("Monthly:Q", title="Monthly Amount ($)"),
+        tooltip=[
+            alt.Tooltip("Goal:N"),
+            alt.Tooltip("Monthly:Q", format="$,.2f"),
+            alt.Tooltip("Months:Q", format=".1f")
+        ]
+    )
+    bars = base.mark_bar(stroke="black", strokeWidth=1.5).encode(
+        color=alt.Color("Goal:N", sort=None, scale=alt.Scale(domain=list(frame["Goal"]), range=colors), legend=None)
+    )
+    labels = base.mark_text(dy=-8, fontSize=11, fontWeight="bold").encode(text="Label:N")
+    return bars + labels
+
+
+def goal_fan_chart(fan):
+    """P10-P90 band, median line and target rule from ``SimulationResult.fan``."""
+    band = alt.Chart(fan).mark_area(opacity=0.3, color='#0078D4').encode(
+        x=alt.X('Date:T', title=None),
+        y=alt.Y('P10:Q', title='Balance ($)'),
+        y2='P90:Q'
+    )
+    median = alt.Chart(fan).mark_line(color='#00274C').encode(x='Date:T', y='P50:Q')
+    target = alt.Chart(fan).mark_rule(color='#a64957', strokeDash=[4, 4]).encode(y='mean(Target):Q')
+    return band + median + target
+
+
+def histogram_chart(bins, title):
+    """Bars for pre-binned counts from ``roster.histogram``."""
+    return alt.Chart(bins, title=title).mark_bar(color='#0078D4', stroke='white', strokeWidth=0.5).encode(
+        x=alt.X('Start:Q', bin='binned', title=None, axis=alt.Axis(format='$,.0f')),
+        x2='End:Q',
+        y=alt.Y('Employees:Q', title='Employees'),
+        tooltip=[
+            alt.Tooltip('Start:Q', format='$,.0f', title='From'),
+            alt.Tooltip('End:Q', format='$,.0f', title='To'),
+            alt.Tooltip('Employees:Q', format=',')
+        ]
+    )
@@ -0,0 +1,70 @@
+"""Small thread-safe LRU cache for built workbooks and roster cohorts."""
+import threading
+from collections import OrderedDict
+
+
+def _nbytes(value):
+    return len(value) if isinstance(value, (bytes, bytearray)) else 0
+
+
+class LRUCache:
+    """Thread-safe LRU cache of any values, with usage counters.
+
+    ``sizeof`` gives a value's size for ``stats()["bytes"]``; by default
+    only ``bytes`` values are counted.
+    """
+
+    def __init__(self, maxsize=64, sizeof=_nbytes):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = render()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def resize(self, maxsize):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        with self._lock:
+            self.maxsize = maxsize
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bytes": sum(self.sizeof(value) for value in self._entries.values()),
+            }
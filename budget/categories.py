@@ -0,0 +1,48 @@
+"""The fixed expense categories, read from ``budget/data/expense_categories.json``.
+
+Each category is one row of ``TABLE``: its input key, the label used on the
+page and in the workbook, an optional shorter chart label, the group it is
+listed under, its default monthly amount, whether it is paid from taxed pay
+(``TAXABLE``; the tax estimate does not read it yet) and the statement
+keywords that match it. The inputs, defaults, totals, the expense chart, the
+workbook rows and statement matching all read this table, so adding a
+category is a change to the data file only.
+"""
+import json
+from pathlib import Path
+
+import pandas as pd
+
+DATA_FILE = Path(__file__).parent / "data" / "expense_categories.json"
+
+
+def _load():
+    with open(DATA_FILE, encoding="utf-8") as handle:
+        entries = json.load(handle)
+    table = pd.DataFrame(
+        {
+            "key": [entry["key"] for entry in entries],
+            "label": [entry["label"] for entry in entries],
+            "chart_label": [entry.get("chart_label", entry["label"]) for entry in entries],
+            "group": [entry["group"] for entry in entries],
+            "default": [float(entry.get("default", 0.0)) for entry in entries],
+            "taxable": [bool(entry.get("taxable", True)) for entry in entries],
+            "keywords": [tuple(entry.get("keywords", ())) for entry in entries],
+        }
+    )
+    # Keys become session-state names, graph inputs and regex group names.
+    invalid = [key for key in table["key"] if not key.isidentifier()]
+    if invalid or table["key"].duplicated().any():
+        raise ValueError(f"Expense category keys must be unique identifiers: {', '.join(invalid) or 'duplicates'}")
+    return table
+
+
+TABLE = _load()
+KEYS = tuple(TABLE["key"])
+LABELS = dict(zip(KEYS, TABLE["label"]))
+CHART_LABELS = dict(zip(KEYS, TABLE["chart_label"]))
+DEFAULTS = dict(zip(KEYS, TABLE["default"]))
+TAXABLE = dict(zip(KEYS, TABLE["taxable"]))
+KEYWORDS = {key: keywords for key, keywords in zip(KEYS, TABLE["keywords"]) if keywords}
+# Groups in the order they first appear, each with its category keys.
+GROUPS = {group: tuple(keys) for group, keys in TABLE.groupby("group", sort=False)["key"]}
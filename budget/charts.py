@@ -0,0 +1,11 @@
+"""Chart colors and labels shared by the page and the workbook.
+
+The page draws Vega-Lite charts in the browser (``budget.altair_charts``) and
+the Excel export uses native workbook charts (``budget.export``), so neither
+rasterizes anything on the server. Both take their palettes from here so the
+two always match.
+"""
+BUDGET_DISTRIBUTION_COLORS = ['#0078D4', '#a64957', '#7cb342', '#fdd835']
+BUDGET_DISTRIBUTION_LABELS = ['Total Income', 'Total Expenses', 'Savings Allocation', 'Remaining']
+EXPENSE_BREAKDOWN_COLORS = ['#0078D4', '#50E6FF', '#7cb342', '#fdd835', '#f06292', '#b0b0b0']
+SAVINGS_GOALS_COLORS = ['#0078D4', '#50E6FF', '#7cb342', '#fdd835', '#f06292']
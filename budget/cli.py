@@ -0,0 +1,183 @@
+"""Generate budget workbooks from the command line, without Streamlit.
+
+Each budget is a record in the ``budget.state`` format, optionally with a
+``"name"``::
+
+    {"name": "Jane Doe", "inputs": {"gross_income": 5417.0, ...},
+     "additional_income": [...], "additional_expenses": [...], "savings_goals": [...]}
+
+Inputs a record leaves out count as zero, or the default for the filing
+status, state and pay frequency, and goals may omit the derived
+``Months`` (see ``budget.state``).
+
+The source is a JSONL file with one record per line, or a directory of
+``*.json`` files (one record each) and ``*.jsonl`` files. Every budget is
+written to ``<output>/<name>.xlsx`` using the same workbook the page
+downloads. Work is spread over a process pool. A budget that fails to parse
+or build is reported and skipped, and the exit status is 1 if any failed::
+
+    python -m budget budgets/ --output workbooks --workers 8
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+from budget import export
+
+
+@dataclass
+class Job:
+    label: str
+    record: dict = None
+    error: str = None
+
+
+@dataclass
+class Result:
+    label: str
+    path: str = None
+    seconds: float = 0.0
+    error: str = None
+
+
+def _describe(error):
+    return f"{type(error).__name__}: {error}"
+
+
+def _job(label, record):
+    if not isinstance(record, dict):
+        return Job(label, error="a budget must be a JSON object")
+    return Job(label, record)
+
+
+def read_jobs(source):
+    """One ``Job`` per budget in ``source``; unreadable entries carry an error instead."""
+    source = Path(source)
+    if source.is_dir():
+        files = sorted(path for path in source.iterdir() if path.suffix in (".json", ".jsonl"))
+    else:
+        files = [source]
+    jobs = []
+    for path in files:
+        try:
+            with open(path, encoding="utf-8") as handle:
+                if path.suffix == ".json":
+                    jobs.append(_job(path.stem, json.load(handle)))
+                    continue
+                for number, line in enumerate(handle, start=1):
+                    if not line.strip():
+                        continue
+                    label = f"{path.name}:{number}"
+                    try:
+                        jobs.append(_job(label, json.loads(line)))
+                    except ValueError as e:
+                        jobs.append(Job(label, error=_describe(e)))
+        except (OSError, ValueError) as e:
+            jobs.append(Job(path.name, error=_describe(e)))
+    return jobs
+
+
+def output_name(job, taken):
+    """A file name from the budget's name (or its source label) not used yet."""
+    name = job.record.get("name") or job.label
+    stem = re.sub(r"[^\w.-]+", "_", str(name)).strip("._") or "budget"
+    candidate, suffix = stem, 2
+    while candidate.lower() in taken:
+        candidate = f"{stem}-{suffix}"
+        suffix += 1
+    taken.add(candidate.lower())
+    return f"{candidate}.xlsx"
+
+
+def build(label, record, path):
+    """Write one workbook; runs in a worker process and never raises."""
+    started = time.perf_counter()
+    try:
+        workbook = export.record_workbook(record)
+        with open(path, "wb") as handle:
+            handle.write(workbook)
+    except Exception as e:  # one bad budget must not stop the batch
+        return Result(label, error=_describe(e), seconds=time.perf_counter() - started)
+    return Result(label, str(path), time.perf_counter() - started)
+
+
+def run(jobs, output_dir, workers=None, progress=None):
+    """Build every job's workbook into ``output_dir`` and return the ``Result`` list.
+
+    ``workers=1`` builds in this process; otherwise a process pool of
+    ``workers`` (default: one per CPU) does the work. ``progress`` is called
+    with ``(done, total, result)`` as each budget finishes.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    total = len(jobs)
+    results = []
+
+    def finish(result):
+        results.append(result)
+        if progress is not None:
+            progress(len(results), total, result)
+
+    taken = set()
+    tasks = []
+    for job in jobs:
+        if job.error is not None:
+            finish(Result(job.label, error=job.error))
+        else:
+            tasks.append((job.label, job.record, output_dir / output_name(job, taken)))
+
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            finish(build(*task))
+        return results
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(build, *task) for task in tasks]
+        for future in as_completed(futures):
+            finish(future.result())
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m budget",
+        description="Write one budget workbook per budget record."
+    )
+    parser.add_argument("source", help="a JSONL file, or a directory of .json/.jsonl files")
+    parser.add_argument("-o", "--output", default="workbooks", help="directory for the .xlsx files")
+    parser.add_argument(
+        "-w", "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes (1 builds in this process)"
+    )
+    parser.add_argument("-q", "--quiet", action="store_true", help="only report failures")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    jobs = read_jobs(args.source)
+    if not jobs:
+        print(f"No budgets found in {args.source}", file=sys.stderr)
+        return 1
+
+    def progress(done, total, result):
+        if result.error is not None:
+            print(f"[{done}/{total}] FAILED {result.label}: {result.error}", file=sys.stderr)
+        elif not args.quiet:
+            print(f"[{done}/{total}] {result.label} -> {result.path} ({result.seconds:.2f}s)", file=sys.stderr)
+
+    started = time.perf_counter()
+    results = run(jobs, args.output, args.workers, progress)
+    failed = [result for result in results if result.error is not None]
+    print(
+        f"Wrote {len(results) - len(failed)} of {len(results)} workbooks to {args.output} "
+        f"in {time.perf_counter() - started:.1f}s"
+        + (f"; {len(failed)} failed" if failed else "")
+    )
+    return 1 if failed else 0
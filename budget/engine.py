@@ -0,0 +1,287 @@
+"""Vectorized budget math shared by the Streamlit page and batch runs.
+
+Every function accepts scalars or NumPy arrays (one element per household)
+and broadcasts, so the page evaluates a single household with the exact same
+code path that scores a whole roster.
+"""
+import numpy as np
+import pandas as pd
+
+from budget import categories, tax
+
+SS_WAGE_BASE_ANNUAL = 168600.0
+SS_WAGE_BASE_MONTHLY = SS_WAGE_BASE_ANNUAL / 12.0
+SOCIAL_SECURITY_RATE = 0.062
+MEDICARE_RATE = 0.0145
+REFUND_ERROR_PERCENT = 10.0
+
+FILING_STATUSES = ("Single", "Married filing jointly", "Married filing separately")
+DEFAULT_FILING_STATUS = "Married filing jointly"
+
+INCOME_COLUMNS = (
+    "gross_income",
+    "fsa_monthly",
+    "retirement_percent",
+    "state_withholding_percent",
+    "federal_withholding_percent",
+    "va_income",
+    "additional_income",
+)
+EXPENSE_COLUMNS = (*categories.KEYS, "additional_expenses")
+
+
+def _float_array(value):
+    return np.asarray(value, dtype=float)
+
+
+def _unwrap(array):
+    # 0-d results come back as NumPy scalars so single-household callers can
+    # format them directly.
+    return array[()] if np.ndim(array) == 0 else array
+
+
+# One function per derived quantity, named after it and taking the quantities
+# it depends on. The compute_* helpers below chain them for whole tables, and
+# budget.graph wires the same functions into a memoized dependency graph.
+
+def retirement_monthly(gross_income, retirement_percent):
+    return gross_income * (retirement_percent / 100.0)
+
+
+def withholding_rate(withholding_percent):
+    return withholding_percent / 100.0
+
+
+def taxable_income(gross_income, fsa_monthly, retirement_monthly):
+    return np.maximum(0.0, gross_income - fsa_monthly - retirement_monthly)
+
+
+def withholding(taxable_income, withholding_rate):
+    return taxable_income * withholding_rate
+
+
+def fica_taxable_income(gross_income, fsa_monthly):
+    return np.maximum(0.0, gross_income - fsa_monthly)
+
+
+def social_security_tax(fica_taxable_income):
+    return np.minimum(fica_taxable_income, SS_WAGE_BASE_MONTHLY) * SOCIAL_SECURITY_RATE
+
+
+def medicare_tax(fica_taxable_income):
+    return fica_taxable_income * MEDICARE_RATE
+
+
+def total_payroll_taxes(social_security_tax, medicare_tax, state_withholding, federal_withholding):
+    return social_security_tax + medicare_tax + state_withholding + federal_withholding
+
+
+def total_payroll_deductions(total_payroll_taxes, fsa_monthly, retirement_monthly):
+    return total_payroll_taxes + fsa_monthly + retirement_monthly
+
+
+def net_main_income(gross_income, total_payroll_deductions):
+    return gross_income - total_payroll_deductions
+
+
+def fixed_expenses(*expense_lines):
+    return sum(expense_lines)
+
+
+def total_income(gross_income, va_income, additional_income):
+    return gross_income + va_income + additional_income
+
+
+def total_expenses(fixed_expenses, total_payroll_taxes, fsa_monthly, retirement_monthly):
+    return fixed_expenses + total_payroll_taxes + fsa_monthly + retirement_monthly
+
+
+def surplus(total_income, total_expenses):
+    return total_income - total_expenses
+
+
+def remaining_surplus(surplus, savings_monthly):
+    return surplus - savings_monthly
+
+
+def annual_amount(monthly_amount):
+    return monthly_amount * 12.0
+
+
+def annual_taxable_income(annual_taxable_base, standard_deduction):
+    return np.maximum(0.0, annual_taxable_base - standard_deduction)
+
+
+def annual_total(federal_amount, state_amount):
+    return federal_amount + state_amount
+
+
+def estimated_refund(annual_total_withholding, annual_total_tax):
+    return annual_total_withholding - annual_total_tax
+
+
+def refund_low_pct(estimated_refund):
+    return estimated_refund - np.abs(estimated_refund) * (REFUND_ERROR_PERCENT / 100.0)
+
+
+def refund_high_pct(estimated_refund):
+    return estimated_refund + np.abs(estimated_refund) * (REFUND_ERROR_PERCENT / 100.0)
+
+
+def compute_payroll(
+    gross_income,
+    fsa_monthly,
+    retirement_percent,
+    state_withholding_percent,
+    federal_withholding_percent,
+):
+    """Monthly withholding, FICA and net pay for the main job."""
+    gross_income = _float_array(gross_income)
+    fsa_monthly = _float_array(fsa_monthly)
+
+    result = {
+        "retirement_monthly": retirement_monthly(gross_income, _float_array(retirement_percent)),
+        "state_withholding_rate": withholding_rate(_float_array(state_withholding_percent)),
+        "federal_withholding_rate": withholding_rate(_float_array(federal_withholding_percent)),
+    }
+    result["taxable_income"] = taxable_income(gross_income, fsa_monthly, result["retirement_monthly"])
+    result["state_withholding"] = withholding(result["taxable_income"], result["state_withholding_rate"])
+    result["federal_withholding"] = withholding(result["taxable_income"], result["federal_withholding_rate"])
+
+    result["fica_taxable_income"] = fica_taxable_income(gross_income, fsa_monthly)
+    result["social_security_tax"] = social_security_tax(result["fica_taxable_income"])
+    result["medicare_tax"] = medicare_tax(result["fica_taxable_income"])
+
+    result["total_payroll_taxes"] = total_payroll_taxes(
+        result["social_security_tax"],
+        result["medicare_tax"],
+        result["state_withholding"],
+        result["federal_withholding"],
+    )
+    result["total_payroll_deductions"] = total_payroll_deductions(
+        result["total_payroll_taxes"], fsa_monthly, result["retirement_monthly"]
+    )
+    result["net_main_income"] = net_main_income(gross_income, result["total_payroll_deductions"])
+    return {name: _unwrap(value) for name, value in result.items()}
+
+
+def compute_totals(
+    gross_income,
+    va_income,
+    additional_income,
+    fixed_expenses,
+    fsa_monthly,
+    payroll,
+):
+    """Total income, total expenses and surplus.
+
+    ``fixed_expenses`` is the sum of every expense line (fixed and added);
+    payroll taxes, FSA and retirement from ``payroll`` are added on top.
+    """
+    income = total_income(
+        _float_array(gross_income), _float_array(va_income), _float_array(additional_income)
+    )
+    expenses = total_expenses(
+        _float_array(fixed_expenses),
+        payroll["total_payroll_taxes"],
+        _float_array(fsa_monthly),
+        payroll["retirement_monthly"],
+    )
+    return {
+        "total_income": _unwrap(income),
+        "total_expenses": _unwrap(expenses),
+        "surplus": _unwrap(surplus(income, expenses)),
+    }
+
+
+ANNUAL_TAX_FIELDS = (
+    "standard_deduction",
+    "annual_taxable_base",
+    "annual_taxable_income",
+    "annual_federal_tax",
+    "state_deduction",
+    "annual_state_tax",
+    "annual_federal_withholding",
+    "annual_state_withholding",
+    "annual_total_withholding",
+    "annual_total_tax",
+    "estimated_refund",
+    "refund_low_pct",
+    "refund_high_pct",
+)
+
+
+def compute_annual_tax(payroll, filing_status, tax_year=tax.DEFAULT_TAX_YEAR, residence_state=tax.DEFAULT_STATE):
+    """Annual federal/state liability versus withholding and the refund estimate."""
+    result = {
+        "standard_deduction": tax.standard_deduction(filing_status, tax_year),
+        "annual_taxable_base": annual_amount(_float_array(payroll["taxable_income"])),
+    }
+    result["annual_taxable_income"] = annual_taxable_income(
+        result["annual_taxable_base"], result["standard_deduction"]
+    )
+    result["annual_federal_tax"] = tax.federal_tax(result["annual_taxable_income"], filing_status, tax_year)
+    result["state_deduction"] = tax.state_deduction(residence_state, filing_status, tax_year)
+    result["annual_state_tax"] = tax.state_tax(
+        result["annual_taxable_base"], residence_state, filing_status, tax_year
+    )
+
+    result["annual_federal_withholding"] = annual_amount(_float_array(payroll["federal_withholding"]))
+    result["annual_state_withholding"] = annual_amount(_float_array(payroll["state_withholding"]))
+
+    result["annual_total_withholding"] = annual_total(
+        result["annual_federal_withholding"], result["annual_state_withholding"]
+    )
+    result["annual_total_tax"] = annual_total(result["annual_federal_tax"], result["annual_state_tax"])
+    result["estimated_refund"] = estimated_refund(result["annual_total_withholding"], result["annual_total_tax"])
+    result["refund_low_pct"] = refund_low_pct(result["estimated_refund"])
+    result["refund_high_pct"] = refund_high_pct(result["estimated_refund"])
+
+    shape = np.broadcast_shapes(*(np.shape(value) for value in result.values()))
+    return {name: _unwrap(np.broadcast_to(value, shape).copy()) for name, value in result.items()}
+
+
+def compute_budget(households, tax_year=tax.DEFAULT_TAX_YEAR):
+    """Compute every derived figure for a table of households at once.
+
+    ``households`` is a DataFrame or a mapping of equal-length arrays. Only
+    ``gross_income`` is required; the other ``INCOME_COLUMNS`` and
+    ``EXPENSE_COLUMNS`` default to zero, ``filing_status`` defaults to
+    ``DEFAULT_FILING_STATUS`` and ``residence_state`` (a two-letter code) to
+    ``tax.DEFAULT_STATE``. Returns a DataFrame aligned with the input rows.
+    """
+    frame = households if isinstance(households, pd.DataFrame) else pd.DataFrame(households)
+    if "gross_income" not in frame:
+        raise ValueError("households must include a 'gross_income' column")
+
+    def column(name):
+        if name in frame:
+            return frame[name].to_numpy(dtype=float)
+        return np.zeros(len(frame))
+
+    if "filing_status" in frame:
+        filing_status = frame["filing_status"].to_numpy(dtype=object)
+    else:
+        filing_status = np.full(len(frame), DEFAULT_FILING_STATUS, dtype=object)
+    if "residence_state" in frame:
+        residence_state = frame["residence_state"].to_numpy(dtype=object)
+    else:
+        residence_state = tax.DEFAULT_STATE
+
+    payroll = compute_payroll(
+        column("gross_income"),
+        column("fsa_monthly"),
+        column("retirement_percent"),
+        column("state_withholding_percent"),
+        column("federal_withholding_percent"),
+    )
+    totals = compute_totals(
+        column("gross_income"),
+        column("va_income"),
+        column("additional_income"),
+        frame.reindex(columns=list(EXPENSE_COLUMNS), fill_value=0.0).to_numpy(dtype=float).sum(axis=1),
+        column("fsa_monthly"),
+        payroll,
+    )
+    annual = compute_annual_tax(payroll, filing_status, tax_year, residence_state)
+    return pd.DataFrame({**payroll, **totals, **annual}, index=frame.index)
@@ -0,0 +1,592 @@
+"""Excel export of the budget, built on demand and memoized by content.
+
+The workbook is only assembled when a download is actually requested, and
+the result is cached under a SHA-256 digest of the export rows and tax
+figures, so downloading an unchanged budget again costs a dictionary lookup.
+"""
+import hashlib
+import io
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from budget import categories, charts, engine, graph, state, tax, tracing
+from budget.cache import LRUCache
+
+workbook_cache = LRUCache(int(os.environ.get("BUDGET_WORKBOOK_CACHE_SIZE", "32")))
+
+TOP_EXPENSES = 5
+# Chart names of the fixed categories and payroll lines, in figure order.
+_BREAKDOWN_NAMES = np.array(
+    [*categories.CHART_LABELS.values(), "Payroll Withholdings (Est.)", "FSA Contribution", "Retirement Contribution"],
+    dtype=object
+)
+_ADDITIONAL_EXPENSE = "Additional Expense: "
+# The annual tax figures plus the flat rates the workbook's tax formulas use.
+WORKBOOK_TAX_FIELDS = engine.ANNUAL_TAX_FIELDS + ("state_withholding_rate", "federal_withholding_rate")
+SECTION_COLORS = {
+    "Income": "#43c0d1",
+    "Expenses": "#a64957",
+    "Summary": "#a29936",
+    "Savings Goals": "#7cb342"
+}
+_SECTION_TAGS = {section: [section] for section in SECTION_COLORS}
+PREVIEW_PAGE_ROWS = 500
+
+
+def export_frame(figures, additional_income, additional_expenses, savings_goals):
+    """The Section/Category/Amount rows of the Budget sheet.
+
+    ``figures`` maps budget quantities by their ``budget.graph`` node names,
+    for example ``Graph.values()``.
+    """
+    income_rows = [
+        {"Section": "Income", "Category": "Main Job (Gross)", "Amount": figures["gross_income"]},
+        {"Section": "Income", "Category": "VA Benefits", "Amount": figures["va_income"]}
+    ]
+    income_rows += [
+        {"Section": "Income", "Category": f"Additional Income: {item['Source']}", "Amount": item["Amount"]}
+        for item in additional_income
+    ]
+    income_rows.append({"Section": "Income", "Category": "Total Income", "Amount": figures["total_income"]})
+
+    expense_rows = [
+        {"Section": "Expenses", "Category": label, "Amount": figures[key]}
+        for key, label in categories.LABELS.items()
+    ]
+    expense_rows += [
+        {"Section": "Expenses", "Category": "Payroll Withholdings (Est.)", "Amount": figures["total_payroll_taxes"]},
+        {"Section": "Expenses", "Category": "FSA Contribution", "Amount": figures["fsa_monthly"]},
+        {"Section": "Expenses", "Category": "Retirement Contribution", "Amount": figures["retirement_monthly"]}
+    ]
+    expense_rows += [
+        {"Section": "Expenses", "Category": f"{_ADDITIONAL_EXPENSE}{item['Expense']}", "Amount": item["Amount"]}
+        for item in additional_expenses
+    ]
+    expense_rows.append({"Section": "Expenses", "Category": "Total Expenses", "Amount": figures["total_expenses"]})
+
+    summary_rows = [
+        {"Section": "Summary", "Category": "Net Main Job Income", "Amount": figures["net_main_income"]},
+        {"Section": "Summary", "Category": "Monthly Surplus", "Amount": figures["surplus"]}
+    ]
+
+    savings_rows = []
+    if savings_goals:
+        for goal in savings_goals:
+            savings_rows.append({
+                "Section": "Savings Goals",
+                "Category": f"{goal['Goal']} (Target: ${goal['Target']:,.2f}, Timeline: {goal['Months']:.1f} months)",
+                "Amount": goal['Monthly']
+            })
+        savings_rows.append({
+            "Section": "Savings Goals",
+            "Category": "Total Savings Allocation",
+            "Amount": figures["savings_monthly"]
+        })
+        savings_rows.append({
+            "Section": "Savings Goals",
+            "Category": "Remaining Surplus",
+            "Amount": figures["remaining_surplus"]
+        })
+
+    return pd.DataFrame(income_rows + expense_rows + summary_rows + savings_rows)
+
+
+def budget_distribution(figures):
+    """Income, expenses, savings allocation and what remains, for the distribution pie."""
+    return [
+        figures["total_income"],
+        figures["total_expenses"],
+        figures["savings_monthly"],
+        max(0, figures["remaining_surplus"])
+    ]
+
+
+def _rank_expenses(line_names, line_amounts, top):
+    """Expense lines combined by name, and the ``top`` largest of them.
+
+    Returns each line's name code, the distinct names, their combined
+    amounts and the codes of the largest ``top``, largest first. A partial
+    selection picks them, so the cost stays linear in the number of lines.
+    """
+    codes, names = pd.factorize(line_names)
+    amounts = np.bincount(codes, weights=line_amounts, minlength=len(names))
+    if len(amounts) <= top:
+        return codes, names, amounts, np.argsort(-amounts, kind="stable")
+    largest = np.argpartition(-amounts, top - 1)[:top]
+    return codes, names, amounts, largest[np.lexsort((largest, -amounts[largest]))]
+
+
+def expense_breakdown(figures, additional_expenses, top=TOP_EXPENSES):
+    """Categories and amounts of the ``top`` largest expenses, the rest summed as "Other Expenses".
+
+    Fixed lines are left out when zero and lines sharing a name are
+    combined. The workbook's breakdown ranks its lines the same way.
+    """
+    fixed_amounts = np.array(
+        [figures[key] for key in categories.KEYS]
+        + [figures["total_payroll_taxes"], figures["fsa_monthly"], figures["retirement_monthly"]],
+        dtype=float
+    )
+    shown = fixed_amounts > 0
+    line_names = np.concatenate([
+        _BREAKDOWN_NAMES[shown], np.array([item["Expense"] for item in additional_expenses], dtype=object)
+    ])
+    line_amounts = np.concatenate([
+        fixed_amounts[shown], np.array([item["Amount"] for item in additional_expenses], dtype=float)
+    ])
+    _, names, amounts, largest = _rank_expenses(line_names, line_amounts, top)
+    if len(largest) == len(names):
+        return names[largest].tolist(), amounts[largest].tolist()
+    rest = np.ones(len(amounts), dtype=bool)
+    rest[largest] = False
+    return names[largest].tolist() + ["Other Expenses"], amounts[largest].tolist() + [float(amounts[rest].sum())]
+
+
+def record_workbook(record):
+    """Workbook bytes for a budget record (see ``budget.state``), without Streamlit."""
+    model = graph.budget_graph(state.graph_inputs(record))
+    figures = model.values()
+    savings_goals = state.savings_goals(record)
+    df = export_frame(
+        figures,
+        record.get("additional_income", []),
+        record.get("additional_expenses", []),
+        savings_goals
+    )
+    return to_excel(
+        df,
+        figures["filing_status"],
+        model.values(WORKBOOK_TAX_FIELDS),
+        savings_goals,
+        figures["tax_year"],
+        figures["residence_state"]
+    )
+
+
+def preview_pages(df, page_rows=PREVIEW_PAGE_ROWS):
+    return max(1, math.ceil(len(df) / page_rows))
+
+
+def preview(df, page=1, page_rows=PREVIEW_PAGE_ROWS):
+    """One page of the Budget sheet for the on-page preview.
+
+    ``Section`` becomes a one-item list per row so the page can show it as a
+    colored tag (``SECTION_COLORS``); the mapping runs once per page through
+    a dict lookup rather than styling each row in Python.
+    """
+    start = (page - 1) * page_rows
+    rows = df.iloc[start:start + page_rows]
+    return rows.assign(Section=rows["Section"].map(_SECTION_TAGS))
+
+
+def export_digest(df, filing_status, annual_tax, residence_state=tax.DEFAULT_STATE, tax_year=tax.DEFAULT_TAX_YEAR):
+    """Content hash of everything that ends up in the workbook."""
+    payload = {
+        "rows": df.to_dict(orient="split"),
+        "filing_status": filing_status,
+        "residence_state": residence_state,
+        # The tax sheet's brackets and formulas are per year.
+        "tax_year": tax_year,
+        "tax": {name: float(value) for name, value in sorted(annual_tax.items())},
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=float).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def budget_workbook(
+    df,
+    filing_status,
+    annual_tax,
+    savings_goals=(),
+    tax_year=tax.DEFAULT_TAX_YEAR,
+    residence_state=tax.DEFAULT_STATE,
+    progress=None
+):
+    """Return workbook bytes, building them only on a cache miss.
+
+    ``annual_tax`` holds the ``WORKBOOK_TAX_FIELDS`` figures; ``progress`` is
+    passed to ``to_excel``.
+    """
+    def render():
+        with tracing.span("to_excel"):
+            return to_excel(df, filing_status, annual_tax, savings_goals, tax_year, residence_state, progress)
+
+    key = export_digest(df, filing_status, annual_tax, residence_state, tax_year)
+    return workbook_cache.get_or_render(key, render)
+
+
+def _line_sum(rows):
+    return f"=SUM(C{rows[0]}:C{rows[-1]})" if rows else "=0"
+
+
+def _bracket_table(worksheet, column, label, table, row, header_format, amount_format, rate_format):
+    """Write one bracket schedule from row 9 down in three columns from ``column``.
+
+    Returns the threshold and rate-change ranges; tax on ``x`` is then
+    ``SUMPRODUCT((x>thresholds)*(x-thresholds)*rate_changes)``, since each
+    bracket adds its rate change on the income above its threshold.
+    """
+    from xlsxwriter.utility import xl_col_to_name
+
+    names = [xl_col_to_name(column + offset) for offset in range(3)]
+    thresholds = table.thresholds[row]
+    bracket_count = int(np.isfinite(thresholds).sum())
+    rates = table.rates[row, :bracket_count]
+    rate_change_values = np.diff(rates, prepend=0.0)
+    for name, title in zip(names, (f'{label} Bracket From', 'Rate', 'Rate Change')):
+        worksheet.write(f'{name}9', title, header_format)
+    for offset in range(bracket_count):
+        excel_row = 10 + offset
+        worksheet.write_number(f'{names[0]}{excel_row}', thresholds[offset], amount_format)
+        worksheet.write_number(f'{names[1]}{excel_row}', rates[offset], rate_format)
+        worksheet.write_formula(
+            f'{names[2]}{excel_row}',
+            f'={names[1]}{excel_row}' if offset == 0 else f'={names[1]}{excel_row}-{names[1]}{excel_row - 1}',
+            rate_format,
+            rate_change_values[offset]
+        )
+    last_row = 9 + bracket_count
+    return f'{names[0]}10:{names[0]}{last_row}', f'{names[2]}10:{names[2]}{last_row}'
+
+
+def to_excel(
+    df,
+    filing_status,
+    annual_tax,
+    savings_goals=(),
+    tax_year=tax.DEFAULT_TAX_YEAR,
+    residence_state=tax.DEFAULT_STATE,
+    progress=None
+):
+    """Build the budget workbook and return it as bytes.
+
+    Line items on the Budget sheet are numbers; totals, the summary and the
+    tax figures are formulas over them (cached with the computed values for
+    readers that do not recalculate), and the Visualizations sheet holds
+    native Excel charts over those cells, so edits in Excel flow through to
+    every total and chart. ``savings_goals`` supplies the goal names for the
+    savings chart. ``progress``, if given, is called with the fraction of
+    the build done as each sheet is finished.
+    """
+    import xlsxwriter
+
+    report = progress or (lambda fraction: None)
+
+    output = io.BytesIO()
+    workbook = xlsxwriter.Workbook(output, {'in_memory': True})
+    worksheet = workbook.add_worksheet("Budget")
+    charts_worksheet = workbook.add_worksheet("Visualizations")
+    tax_worksheet = workbook.add_worksheet("Estimated Tax Return")
+
+    formats = {
+        "Income": workbook.add_format({'bg_color': '#e0f7fa', 'num_format': '$#,##0.00'}),
+        "Expenses": workbook.add_format({'bg_color': '#ffebee', 'num_format': '$#,##0.00'}),
+        "Savings": workbook.add_format({'bg_color': '#e8f5e9', 'num_format': '$#,##0.00'}),
+        "Savings Goals": workbook.add_format({'bg_color': '#e8f5e9', 'num_format': '$#,##0.00'}),
+        "Summary": workbook.add_format({'bg_color': '#fffde7', 'num_format': '$#,##0.00'}),
+        "Header": workbook.add_format({'bold': True, 'bg_color': '#bdbdbd', 'border': 1}),
+        "Default": workbook.add_format({'num_format': '$#,##0.00'})
+    }
+    tax_formats = {
+        "Base": workbook.add_format({'bg_color': '#e3f2fd', 'num_format': '$#,##0.00'}),
+        "Deduction": workbook.add_format({'bg_color': '#fff8e1', 'num_format': '$#,##0.00'}),
+        "Taxable": workbook.add_format({'bg_color': '#e8f5e9', 'num_format': '$#,##0.00'}),
+        "Liability": workbook.add_format({'bg_color': '#ffebee', 'num_format': '$#,##0.00'}),
+        "Withholding": workbook.add_format({'bg_color': '#e8f5e9', 'num_format': '$#,##0.00'}),
+        "Refund": workbook.add_format({'num_format': '$#,##0.00'}),
+        "RefundPositive": workbook.add_format({'font_color': '#1b5e20'}),
+        "RefundNegative": workbook.add_format({'font_color': '#b71c1c'}),
+        "Rate": workbook.add_format({'num_format': '0.00%'}),
+        "Note": workbook.add_format({'font_color': '#5f6368'})
+    }
+
+    for col_num, value in enumerate(df.columns):
+        worksheet.write(0, col_num, value, formats["Header"])
+
+    # Excel row of each category's amount, and of each section's line items.
+    cells = {}
+    line_rows = {"Income": [], "Expenses": [], "Savings Goals": []}
+    totals = {
+        "Total Income": lambda: _line_sum(line_rows["Income"]),
+        "Total Expenses": lambda: _line_sum(line_rows["Expenses"]),
+        "Net Main Job Income": lambda: (
+            f"={cells['Main Job (Gross)']}-{cells['Payroll Withholdings (Est.)']}"
+            f"-{cells['FSA Contribution']}-{cells['Retirement Contribution']}"
+        ),
+        "Monthly Surplus": lambda: f"={cells['Total Income']}-{cells['Total Expenses']}",
+        "Total Savings Allocation": lambda: _line_sum(line_rows["Savings Goals"]),
+        "Remaining Surplus": lambda: f"={cells['Monthly Surplus']}-{cells['Total Savings Allocation']}"
+    }
+    for row_num, row in enumerate(df.itertuples(index=False), 1):
+        section = getattr(row, "Section")
+        fmt = formats.get(section, formats["Default"])
+        worksheet.write(row_num, 0, row.Section)
+        worksheet.write(row_num, 1, row.Category)
+        cells[row.Category] = f"C{row_num + 1}"
+        if row.Category in totals:
+            worksheet.write_formula(row_num, 2, totals[row.Category](), fmt, row.Amount)
+        else:
+            worksheet.write_number(row_num, 2, row.Amount, fmt)
+            line_rows.setdefault(section, []).append(row_num + 1)
+
+    worksheet.set_column(0, 0, 12)
+    worksheet.set_column(1, 1, 35)
+    worksheet.set_column(2, 2, 18)
+    report(0.4)
+
+    title_format = workbook.add_format({'bold': True, 'font_size': 14, 'color': '#0078D4'})
+    charts_worksheet.write('A1', 'Budget Visualizations', title_format)
+    charts_worksheet.write('A2', 'Charts follow the Budget sheet; edit amounts there.', tax_formats["Note"])
+
+    def chart_table(first_row, title, rows):
+        # Writes ``rows`` of (label, formula, cached value) under a header and
+        # returns the zero-based first and last data rows. A label may be a
+        # (formula, cached text) pair.
+        charts_worksheet.write(first_row, 0, title, formats["Header"])
+        charts_worksheet.write(first_row, 1, "Amount", formats["Header"])
+        for offset, (label, formula, value) in enumerate(rows, start=1):
+            if isinstance(label, tuple):
+                charts_worksheet.write_formula(first_row + offset, 0, label[0], None, label[1])
+            else:
+                charts_worksheet.write(first_row + offset, 0, label)
+            charts_worksheet.write_formula(first_row + offset, 1, formula, formats["Default"], value)
+        return first_row + 1, first_row + len(rows)
+
+    def pie_chart(title, data_rows, colors, anchor):
+        first, last = data_rows
+        chart = workbook.add_chart({'type': 'pie'})
+        chart.add_series({
+            'name': title,
+            'categories': ["Visualizations", first, 0, last, 0],
+            'values': ["Visualizations", first, 1, last, 1],
+            'points': [{'fill': {'color': color}, 'border': {'color': 'white'}} for color in colors],
+            'data_labels': {'value': True, 'percentage': True, 'num_format': '$#,##0', 'separator': '\n'}
+        })
+        chart.set_title({'name': title})
+        chart.set_legend({'position': 'bottom'})
+        charts_worksheet.insert_chart(anchor, chart, {'x_scale': 1.2, 'y_scale': 1.2})
+
+    amounts = dict(zip(df["Category"], df["Amount"]))
+    total_savings = cells.get("Total Savings Allocation")
+    remaining = cells.get("Remaining Surplus", cells["Monthly Surplus"])
+    distribution = chart_table(3, "Budget Distribution", [
+        (charts.BUDGET_DISTRIBUTION_LABELS[0], f"=Budget!{cells['Total Income']}", amounts["Total Income"]),
+        (charts.BUDGET_DISTRIBUTION_LABELS[1], f"=Budget!{cells['Total Expenses']}", amounts["Total Expenses"]),
+        (
+            charts.BUDGET_DISTRIBUTION_LABELS[2],
+            f"=Budget!{total_savings}" if total_savings else "=0",
+            amounts.get("Total Savings Allocation", 0.0)
+        ),
+        (
+            charts.BUDGET_DISTRIBUTION_LABELS[3],
+            f"=MAX(0,Budget!{remaining})",
+            max(0, amounts.get("Remaining Surplus", amounts["Monthly Surplus"]))
+        )
+    ])
+    pie_chart("Budget Distribution", distribution, charts.BUDGET_DISTRIBUTION_COLORS, 'E3')
+
+    # Ranked as on the page (expense_breakdown); the ranking is fixed when the
+    # workbook is built, while each amount links to its Budget sheet lines and
+    # "Other Expenses" is whatever the top lines leave of the live total.
+    # Budget sheet row n holds df row n - 2 (one header row, one-based rows).
+    expense_rows = np.array(line_rows["Expenses"], dtype=int)
+    line_amounts = df["Amount"].to_numpy(dtype=float)[expense_rows - 2]
+    fixed = len(_BREAKDOWN_NAMES)
+    line_names = np.concatenate([
+        _BREAKDOWN_NAMES,
+        np.array([category[len(_ADDITIONAL_EXPENSE):] for category in df["Category"].iloc[expense_rows[fixed:] - 2]],
+                 dtype=object)
+    ])
+    kept = np.concatenate([line_amounts[:fixed] > 0, np.ones(len(expense_rows) - fixed, dtype=bool)])
+    expense_rows = expense_rows[kept]
+    codes, names, amounts, largest = _rank_expenses(line_names[kept], line_amounts[kept], TOP_EXPENSES)
+    breakdown_rows = [
+        (names[code], "=" + "+".join(f"Budget!C{row}" for row in expense_rows[codes == code]), amounts[code])
+        for code in largest
+    ]
+    if len(largest) < len(names):
+        top_cells = ",".join(f"Budget!C{row}" for row in expense_rows[np.isin(codes, largest)])
+        breakdown_rows.append((
+            "Other Expenses",
+            f"=Budget!{cells['Total Expenses']}-SUM({top_cells})",
+            float(amounts.sum() - amounts[largest].sum())
+        ))
+    breakdown_first = distribution[1] + 3
+    if breakdown_rows:
+        breakdown = chart_table(breakdown_first, f"Top {TOP_EXPENSES} Expenses", breakdown_rows)
+        pie_chart(
+            f"Where Your Money Goes (Top {TOP_EXPENSES})",
+            breakdown,
+            charts.EXPENSE_BREAKDOWN_COLORS[:len(breakdown_rows)],
+            'E23'
+        )
+
+    goal_rows = line_rows["Savings Goals"]
+    if savings_goals and len(savings_goals) == len(goal_rows):
+        goals_first = breakdown_first + len(breakdown_rows) + 3
+        charts_worksheet.write(goals_first, 0, "Savings Goal", formats["Header"])
+        charts_worksheet.write(goals_first, 1, "Monthly", formats["Header"])
+        charts_worksheet.write(goals_first, 2, "Months", formats["Header"])
+        for offset, (goal, row) in enumerate(zip(savings_goals, goal_rows), start=1):
+            charts_worksheet.write(goals_first + offset, 0, goal["Goal"])
+            charts_worksheet.write_formula(
+                goals_first + offset, 1, f"=Budget!C{row}", formats["Default"], goal["Monthly"]
+            )
+            charts_worksheet.write_formula(
+                goals_first + offset,
+                2,
+                f"=IF(B{goals_first + offset + 1}>0,{goal['Target']}/B{goals_first + offset + 1},0)",
+                None,
+                round(goal["Months"], 1)
+            )
+        chart = workbook.add_chart({'type': 'column'})
+        chart.add_series({
+            'name': 'Monthly Savings Contributions',
+            'categories': ["Visualizations", goals_first + 1, 0, goals_first + len(goal_rows), 0],
+            'values': ["Visualizations", goals_first + 1, 1, goals_first + len(goal_rows), 1],
+            'points': [
+                {'fill': {'color': charts.SAVINGS_GOALS_COLORS[i % len(charts.SAVINGS_GOALS_COLORS)]},
+                 'border': {'color': 'black'}}
+                for i in range(len(goal_rows))
+            ],
+            'data_labels': {'value': True, 'num_format': '$#,##0.00'}
+        })
+        chart.set_title({'name': 'Monthly Savings Contributions'})
+        chart.set_y_axis({'name': 'Monthly Amount ($)', 'num_format': '$#,##0'})
+        chart.set_legend({'none': True})
+        charts_worksheet.insert_chart('E43', chart, {'x_scale': 1.2, 'y_scale': 1.2})
+
+    charts_worksheet.set_column(0, 0, 32)
+    charts_worksheet.set_column(1, 2, 14)
+    report(0.6)
+
+    states = tax.state_table(tax_year)
+    state_row = states.rows(residence_state, filing_status)
+    state_name = states.names[residence_state]
+
+    tax_worksheet.write('A1', 'Estimated Tax Return (Annual)', title_format)
+    tax_worksheet.write('A3', 'Filing Status', formats["Header"])
+    tax_worksheet.write('B3', filing_status)
+
+    tax_worksheet.write('A4', 'Notes', formats["Header"])
+    tax_worksheet.write(
+        'B4',
+        f'{tax_year} federal and {state_name} brackets and deductions; flat withholding rates',
+        tax_formats["Note"]
+    )
+    tax_worksheet.write('A5', 'Tax Liability', formats["Header"])
+    tax_worksheet.write(
+        'B5',
+        'Federal tax liability + state tax liability',
+        tax_formats["Note"]
+    )
+    tax_worksheet.write('A6', 'Refund Formula', formats["Header"])
+    tax_worksheet.write(
+        'B6',
+        'Total withholdings - total tax liability',
+        tax_formats["Note"]
+    )
+    tax_worksheet.write('A7', 'Error Range', formats["Header"])
+    tax_worksheet.write(
+        'B7',
+        f'Shown as +/-{engine.REFUND_ERROR_PERCENT:.0f}% of estimated refund/owed',
+        tax_formats["Note"]
+    )
+
+    # Federal and state brackets for the filing status, so both liabilities
+    # are formulas over the tables.
+    federal = tax.federal_table(tax_year)
+    brackets, rate_changes = _bracket_table(
+        tax_worksheet, 3, 'Federal', federal, federal.rows(filing_status),
+        formats["Header"], formats["Default"], tax_formats["Rate"]
+    )
+    state_brackets, state_rate_changes = _bracket_table(
+        tax_worksheet, 7, 'State', states.brackets, state_row,
+        formats["Header"], formats["Default"], tax_formats["Rate"]
+    )
+    state_taxable = "MAX(0,B10-B28)"
+
+    error_rate = engine.REFUND_ERROR_PERCENT / 100.0
+    tax_rows = [
+        (
+            "Annual Taxable Base (gross - FSA - retirement)",
+            f"=12*MAX(0,Budget!{cells['Main Job (Gross)']}-Budget!{cells['FSA Contribution']}"
+            f"-Budget!{cells['Retirement Contribution']})",
+            "annual_taxable_base",
+            "Base"
+        ),
+        (f"Standard Deduction ({tax_year})", None, "standard_deduction", "Deduction"),
+        ("Annual Taxable Income", "=MAX(0,B10-B11)", "annual_taxable_income", "Taxable"),
+        (
+            "Federal Tax Liability (Est.)",
+            f"=SUMPRODUCT((B12>{brackets})*(B12-{brackets})*{rate_changes})",
+            "annual_federal_tax",
+            "Liability"
+        ),
+        (
+            "State Tax Liability (Est.)",
+            f"=MAX(0,SUMPRODUCT(({state_taxable}>{state_brackets})*({state_taxable}-{state_brackets})"
+            f"*{state_rate_changes})-B29)",
+            "annual_state_tax",
+            "Liability"
+        ),
+        ("Federal Withholding (Annual)", "=B10*B24", "annual_federal_withholding", "Withholding"),
+        ("State Withholding (Annual)", "=B10*B23", "annual_state_withholding", "Withholding"),
+        ("Total Withholding (Annual)", "=B15+B16", "annual_total_withholding", "Withholding"),
+        ("Estimated Refund / Amount Owed", "=B17-(B13+B14)", "estimated_refund", "Refund"),
+        (
+            f"Refund Range (±{engine.REFUND_ERROR_PERCENT:.0f}%) Low",
+            f"=B18-ABS(B18)*{error_rate}",
+            "refund_low_pct",
+            "Refund"
+        ),
+        (
+            f"Refund Range (±{engine.REFUND_ERROR_PERCENT:.0f}%) High",
+            f"=B18+ABS(B18)*{error_rate}",
+            "refund_high_pct",
+            "Refund"
+        )
+    ]
+
+    tax_worksheet.write('A9', 'Category', formats["Header"])
+    tax_worksheet.write('B9', 'Amount', formats["Header"])
+    for idx, (label, formula, field, category) in enumerate(tax_rows, start=10):
+        tax_worksheet.write(f'A{idx}', label)
+        fmt = tax_formats.get(category, formats["Default"])
+        if formula is None:
+            tax_worksheet.write_number(f'B{idx}', annual_tax[field], fmt)
+        else:
+            tax_worksheet.write_formula(f'B{idx}', formula, fmt, float(annual_tax[field]))
+    tax_worksheet.conditional_format('B18:B20', {
+        'type': 'cell', 'criteria': '>=', 'value': 0, 'format': tax_formats["RefundPositive"]
+    })
+    tax_worksheet.conditional_format('B18:B20', {
+        'type': 'cell', 'criteria': '<', 'value': 0, 'format': tax_formats["RefundNegative"]
+    })
+
+    tax_worksheet.write('A22', 'Rates', formats["Header"])
+    tax_worksheet.write('A23', 'State Withholding Rate')
+    tax_worksheet.write_number('B23', annual_tax["state_withholding_rate"], tax_formats["Rate"])
+    tax_worksheet.write('A24', 'Federal Withholding Rate')
+    tax_worksheet.write_number('B24', annual_tax["federal_withholding_rate"], tax_formats["Rate"])
+
+    tax_worksheet.write('A26', 'State', formats["Header"])
+    tax_worksheet.write('A27', 'State of Residence')
+    tax_worksheet.write('B27', state_name)
+    tax_worksheet.write('A28', 'State Deductions + Exemptions')
+    tax_worksheet.write_number('B28', annual_tax["state_deduction"], tax_formats["Deduction"])
+    tax_worksheet.write('A29', 'State Credits')
+    tax_worksheet.write_number('B29', states.brackets.credits[state_row], tax_formats["Deduction"])
+
+    tax_worksheet.set_column(0, 0, 40)
+    tax_worksheet.set_column(1, 1, 20)
+    tax_worksheet.set_column(3, 9, 14)
+    report(0.7)
+
+    workbook.close()
+    report(1.0)
+    return output.getvalue()
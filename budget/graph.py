@@ -0,0 +1,263 @@
+"""Reactive dependency graph over the budget's derived quantities.
+
+Every quantity is a node: either an input set from outside, or a formula
+node that memoizes ``function(*dependencies)``. ``update`` marks the nodes
+downstream of the inputs that actually changed and recomputes them in
+dependency order. When a recomputed value comes out unchanged, its own
+dependents stay clean. Recompute cost therefore follows the size of the
+change, not the size of the model, and ``last_recomputed`` records which
+nodes the last effective change touched.
+"""
+import heapq
+
+import numpy as np
+import pandas as pd
+
+from budget import engine, payroll, tax
+
+
+def _same(old, new):
+    if old is new:
+        return True
+    try:
+        return bool(np.array_equal(old, new))
+    except (TypeError, ValueError):
+        return False
+
+
+class Graph:
+    """Memoized nodes with declared inputs.
+
+    Formula nodes must be declared after every node they depend on, so
+    declaration order is a valid evaluation order.
+    """
+
+    def __init__(self):
+        self._functions = {}
+        self._dependencies = {}
+        self._dependents = {}
+        self._position = {}
+        self._values = {}
+        self.last_recomputed = ()
+
+    def _add(self, name, function, dependencies):
+        if name in self._position:
+            raise ValueError(f"node {name!r} is already defined")
+        missing = [dependency for dependency in dependencies if dependency not in self._position]
+        if missing:
+            raise ValueError(f"node {name!r} depends on undefined nodes: {', '.join(missing)}")
+        self._position[name] = len(self._position)
+        self._functions[name] = function
+        self._dependencies[name] = tuple(dependencies)
+        self._dependents[name] = []
+        for dependency in dependencies:
+            self._dependents[dependency].append(name)
+
+    def input(self, name, value):
+        """Declare an input node holding ``value``."""
+        self._add(name, None, ())
+        self._values[name] = value
+
+    def node(self, name, function, dependencies):
+        """Declare a formula node and compute it once."""
+        self._add(name, function, dependencies)
+        self._values[name] = self._compute(name)
+
+    def _compute(self, name):
+        return self._functions[name](*(self._values[dependency] for dependency in self._dependencies[name]))
+
+    def update(self, values=None, **changes):
+        """Set inputs and recompute whatever depends on the ones that changed.
+
+        Returns the names of the recomputed nodes in evaluation order. Updates
+        that change nothing leave ``last_recomputed`` as it was.
+        """
+        changes = {**(values or {}), **changes}
+        for name in changes:
+            if name not in self._position:
+                raise KeyError(name)
+            if self._functions[name] is not None:
+                raise ValueError(f"{name!r} is a formula node and cannot be set")
+
+        dirty = []
+        for name, value in changes.items():
+            if not _same(self._values[name], value):
+                self._values[name] = value
+                for dependent in self._dependents[name]:
+                    heapq.heappush(dirty, (self._position[dependent], dependent))
+        if not dirty:
+            return ()
+
+        recomputed = []
+        while dirty:
+            _, name = heapq.heappop(dirty)
+            if recomputed and recomputed[-1] == name:
+                continue
+            value = self._compute(name)
+            recomputed.append(name)
+            if not _same(self._values[name], value):
+                self._values[name] = value
+                for dependent in self._dependents[name]:
+                    heapq.heappush(dirty, (self._position[dependent], dependent))
+        self.last_recomputed = tuple(recomputed)
+        return self.last_recomputed
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+    def __contains__(self, name):
+        return name in self._position
+
+    def values(self, names=None):
+        """Current values of ``names`` (every node by default) as a dict."""
+        return {name: self._values[name] for name in (self._position if names is None else names)}
+
+    @property
+    def inputs(self):
+        return tuple(name for name in self._position if self._functions[name] is None)
+
+    @property
+    def nodes(self):
+        return tuple(self._position)
+
+    def dependencies(self, name):
+        return self._dependencies[name]
+
+    def dependents(self, name):
+        return tuple(self._dependents[name])
+
+    def downstream(self, name):
+        """Every node that ``name`` feeds, directly or transitively, in evaluation order."""
+        seen = set()
+        stack = list(self._dependents[name])
+        while stack:
+            node = stack.pop()
+            if node not in seen:
+                seen.add(node)
+                stack.extend(self._dependents[node])
+        return tuple(sorted(seen, key=self._position.get))
+
+    def describe(self):
+        """One row per node: kind, declared inputs, value and whether it last recomputed."""
+        recomputed = set(self.last_recomputed)
+        return pd.DataFrame(
+            {
+                "Node": list(self._position),
+                "Kind": ["input" if self._functions[name] is None else "formula" for name in self._position],
+                "Depends on": [", ".join(self._dependencies[name]) for name in self._position],
+                "Value": [self._values[name] for name in self._position],
+                "Recomputed": [name in recomputed for name in self._position],
+            }
+        )
+
+
+BUDGET_INPUTS = (
+    "gross_income",
+    "fsa_monthly",
+    "retirement_percent",
+    "state_withholding_percent",
+    "federal_withholding_percent",
+    "va_income",
+    "additional_income",
+    *engine.EXPENSE_COLUMNS,
+    "savings_monthly",
+    "filing_status",
+    "tax_year",
+    "pay_frequency",
+    "residence_state",
+)
+
+# (node, formula, declared inputs) in evaluation order.
+BUDGET_NODES = (
+    ("retirement_monthly", engine.retirement_monthly, ("gross_income", "retirement_percent")),
+    ("state_withholding_rate", engine.withholding_rate, ("state_withholding_percent",)),
+    ("federal_withholding_rate", engine.withholding_rate, ("federal_withholding_percent",)),
+    ("taxable_income", engine.taxable_income, ("gross_income", "fsa_monthly", "retirement_monthly")),
+    ("state_withholding", engine.withholding, ("taxable_income", "state_withholding_rate")),
+    ("federal_withholding", engine.withholding, ("taxable_income", "federal_withholding_rate")),
+    ("fica_taxable_income", engine.fica_taxable_income, ("gross_income", "fsa_monthly")),
+    ("social_security_tax", engine.social_security_tax, ("fica_taxable_income",)),
+    ("medicare_tax", engine.medicare_tax, ("fica_taxable_income",)),
+    (
+        "total_payroll_taxes",
+        engine.total_payroll_taxes,
+        ("social_security_tax", "medicare_tax", "state_withholding", "federal_withholding"),
+    ),
+    (
+        "total_payroll_deductions",
+        engine.total_payroll_deductions,
+        ("total_payroll_taxes", "fsa_monthly", "retirement_monthly"),
+    ),
+    ("net_main_income", engine.net_main_income, ("gross_income", "total_payroll_deductions")),
+    ("fixed_expenses", engine.fixed_expenses, engine.EXPENSE_COLUMNS),
+    ("total_income", engine.total_income, ("gross_income", "va_income", "additional_income")),
+    (
+        "total_expenses",
+        engine.total_expenses,
+        ("fixed_expenses", "total_payroll_taxes", "fsa_monthly", "retirement_monthly"),
+    ),
+    ("surplus", engine.surplus, ("total_income", "total_expenses")),
+    ("remaining_surplus", engine.remaining_surplus, ("surplus", "savings_monthly")),
+    ("standard_deduction", tax.standard_deduction, ("filing_status", "tax_year")),
+    ("annual_taxable_base", engine.annual_amount, ("taxable_income",)),
+    ("annual_taxable_income", engine.annual_taxable_income, ("annual_taxable_base", "standard_deduction")),
+    ("annual_federal_tax", tax.federal_tax, ("annual_taxable_income", "filing_status", "tax_year")),
+    ("state_deduction", tax.state_deduction, ("residence_state", "filing_status", "tax_year")),
+    (
+        "annual_state_tax",
+        tax.state_tax,
+        ("annual_taxable_base", "residence_state", "filing_status", "tax_year"),
+    ),
+    ("annual_federal_withholding", engine.annual_amount, ("federal_withholding",)),
+    ("annual_state_withholding", engine.annual_amount, ("state_withholding",)),
+    (
+        "annual_total_withholding",
+        engine.annual_total,
+        ("annual_federal_withholding", "annual_state_withholding"),
+    ),
+    ("annual_total_tax", engine.annual_total, ("annual_federal_tax", "annual_state_tax")),
+    ("estimated_refund", engine.estimated_refund, ("annual_total_withholding", "annual_total_tax")),
+    ("refund_low_pct", engine.refund_low_pct, ("estimated_refund",)),
+    ("refund_high_pct", engine.refund_high_pct, ("estimated_refund",)),
+    (
+        "paycheck_schedule",
+        payroll.paycheck_schedule,
+        (
+            "gross_income",
+            "fsa_monthly",
+            "retirement_percent",
+            "state_withholding_percent",
+            "federal_withholding_percent",
+            "pay_frequency",
+            "tax_year",
+        ),
+    ),
+)
+
+
+def budget_graph(values=None, **inputs):
+    """A ``Graph`` of every budget quantity for one household.
+
+    Inputs are the ``BUDGET_INPUTS`` names; missing amounts default to zero,
+    ``filing_status`` to ``engine.DEFAULT_FILING_STATUS``, ``tax_year`` to
+    ``tax.DEFAULT_TAX_YEAR``, ``pay_frequency`` to
+    ``payroll.DEFAULT_PAY_FREQUENCY`` and ``residence_state`` to
+    ``tax.DEFAULT_STATE``.
+    """
+    inputs = {**(values or {}), **inputs}
+    unknown = set(inputs) - set(BUDGET_INPUTS)
+    if unknown:
+        raise KeyError(f"unknown budget inputs: {', '.join(sorted(unknown))}")
+    defaults = {
+        "filing_status": engine.DEFAULT_FILING_STATUS,
+        "tax_year": tax.DEFAULT_TAX_YEAR,
+        "pay_frequency": payroll.DEFAULT_PAY_FREQUENCY,
+        "residence_state": tax.DEFAULT_STATE,
+    }
+
+    graph = Graph()
+    for name in BUDGET_INPUTS:
+        graph.input(name, inputs.get(name, defaults.get(name, 0.0)))
+    for name, function, dependencies in BUDGET_NODES:
+        graph.node(name, function, dependencies)
+    return graph
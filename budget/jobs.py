@@ -0,0 +1,171 @@
+"""Bounded background pool for heavy report jobs.
+
+Page runs submit report builds (the Excel workbook) here instead of running
+them in the script thread, then pick up the finished artifact on a later
+rerun. Jobs are keyed by a content hash: submitting a key that is queued,
+running or recently finished returns that job, so sessions asking for
+identical output share one build. The last ``keep`` finished jobs stay
+available for pickup. Failed jobs stay too, so the page can show the error,
+and submitting their key again retries.
+
+A job function receives a ``progress`` keyword it can call with the
+fraction done. ``stats()`` reports queue depth, running jobs and, per job
+kind, p50/p95 latency from submission to completion. The pool adds the same
+figures to ``tracing.recorder``'s Prometheus file.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from budget import tracing
+
+WORKERS = int(os.environ.get("BUDGET_JOB_WORKERS", "2"))
+MAX_QUEUE = int(os.environ.get("BUDGET_JOB_QUEUE", "16"))
+KEEP = int(os.environ.get("BUDGET_JOB_KEEP", "32"))
+WINDOW = 1000
+QUANTILES = (0.5, 0.95)
+
+
+class QueueFull(RuntimeError):
+    """Raised by ``JobPool.submit`` when ``max_queue`` jobs are already waiting."""
+
+
+class Job:
+    """One submitted build; ``result`` or ``error`` is set once it finishes."""
+
+    def __init__(self, key, kind):
+        self.key = key
+        self.kind = kind
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+
+    @property
+    def status(self):
+        if self.finished is not None:
+            return "failed" if self.error is not None else "done"
+        return "running" if self.started is not None else "queued"
+
+    @property
+    def done(self):
+        return self.finished is not None
+
+    @property
+    def latency(self):
+        """Seconds from submission to completion, or ``None`` while pending."""
+        return None if self.finished is None else self.finished - self.submitted
+
+    def report(self, fraction):
+        self.progress = min(1.0, max(self.progress, float(fraction)))
+
+
+class JobPool:
+    """Thread pool of ``workers`` that deduplicates jobs by key."""
+
+    def __init__(self, workers=WORKERS, max_queue=MAX_QUEUE, keep=KEEP, window=WINDOW):
+        if workers < 1 or max_queue < 1 or keep < 1:
+            raise ValueError("workers, max_queue and keep must be at least 1")
+        self.workers = workers
+        self.max_queue = max_queue
+        self.keep = keep
+        self.submitted = 0
+        self.deduplicated = 0
+        self.rejected = 0
+        self._jobs = OrderedDict()
+        self._latencies = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def submit(self, key, kind, function, *args, **kwargs):
+        """Run ``function(*args, progress=..., **kwargs)`` in the pool, or return the job already under ``key``."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.status != "failed":
+                self._jobs.move_to_end(key)
+                self.deduplicated += 1
+                return job
+            if self._count("queued") >= self.max_queue:
+                self.rejected += 1
+                raise QueueFull(f"{self.max_queue} report jobs are already waiting")
+            job = Job(key, kind)
+            self._jobs[key] = job
+            self.submitted += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="budget-job")
+            executor = self._executor
+        executor.submit(self._run, job, function, args, kwargs)
+        return job
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def _run(self, job, function, args, kwargs):
+        job.started = time.time()
+        try:
+            job.result = function(*args, progress=job.report, **kwargs)
+        except Exception as e:  # reported on the page through the job
+            job.error = f"{type(e).__name__}: {e}"
+        job.report(1.0)
+        job.finished = time.time()
+        with self._lock:
+            self._latencies[job.kind].append(job.latency)
+            self._evict()
+        if tracing.ENABLED:
+            tracing.recorder.write_metrics()
+
+    def _count(self, status):
+        return sum(1 for job in self._jobs.values() if job.status == status)
+
+    def _evict(self):
+        # Drop the least recently used finished jobs; pending ones always stay.
+        finished = [key for key, job in self._jobs.items() if job.done]
+        for key in finished[:max(0, len(finished) - self.keep)]:
+            del self._jobs[key]
+
+    def stats(self):
+        with self._lock:
+            counts = {status: self._count(status) for status in ("queued", "running", "done", "failed")}
+            latencies = {kind: np.array(values) for kind, values in self._latencies.items() if values}
+            return {
+                "workers": self.workers,
+                **counts,
+                "submitted": self.submitted,
+                "deduplicated": self.deduplicated,
+                "rejected": self.rejected,
+                "latency": {
+                    kind: dict(zip(QUANTILES, np.quantile(values, QUANTILES))) for kind, values in latencies.items()
+                },
+            }
+
+    def metric_lines(self):
+        """Prometheus text-format lines for ``tracing.Recorder.metric_sources``."""
+        stats = self.stats()
+        lines = [
+            "# HELP budget_jobs Report jobs by state.",
+            "# TYPE budget_jobs gauge",
+            *(f'budget_jobs{{state="{state}"}} {stats[state]}' for state in ("queued", "running", "done", "failed")),
+            "# HELP budget_jobs_submitted_total Report jobs started, deduplicated and rejected.",
+            "# TYPE budget_jobs_submitted_total counter",
+            f'budget_jobs_submitted_total{{outcome="started"}} {stats["submitted"]}',
+            f'budget_jobs_submitted_total{{outcome="deduplicated"}} {stats["deduplicated"]}',
+            f'budget_jobs_submitted_total{{outcome="rejected"}} {stats["rejected"]}',
+            "# HELP budget_job_latency_seconds Submission to completion per job kind "
+            f"(quantiles over the last {WINDOW} jobs).",
+            "# TYPE budget_job_latency_seconds summary",
+        ]
+        for kind, quantiles in sorted(stats["latency"].items()):
+            for quantile, seconds in quantiles.items():
+                lines.append(f'budget_job_latency_seconds{{kind="{kind}",quantile="{quantile}"}} {seconds:.6f}')
+        return lines
+
+
+pool = JobPool()
+tracing.recorder.metric_sources.append(pool.metric_lines)
@@ -0,0 +1,151 @@
+"""Paycheck-by-paycheck payroll over a calendar year.
+
+``budget.engine`` works in monthly averages, which is right for totals but
+hides when Social Security stops: the wage base caps year-to-date wages, so
+a high earner pays the full 6.2% on every check until the base is reached
+and nothing after. Here every amount is laid out along a periods axis
+(one row per employee, one column per paycheck) and the cap is applied to
+cumulative wages, so the crossing check is split exactly.
+"""
+import numpy as np
+import pandas as pd
+
+from budget import engine, tax
+
+PAY_FREQUENCIES = {
+    "Weekly": 52,
+    "Biweekly": 26,
+    "Semimonthly": 24,
+    "Monthly": 12,
+}
+DEFAULT_PAY_FREQUENCY = "Monthly"
+
+# pandas offsets for the pay dates: Fridays, the 15th and last day of the
+# month, or the last day of the month. The "SME"/"ME" aliases need pandas 2.2.
+_PAY_DATE_FREQUENCIES = {
+    "Weekly": "W-FRI",
+    "Biweekly": "2W-FRI",
+    "Semimonthly": "SME",
+    "Monthly": "ME",
+}
+
+PAYCHECK_FIELDS = (
+    "gross_pay",
+    "fsa",
+    "retirement",
+    "taxable_pay",
+    "state_withholding",
+    "federal_withholding",
+    "fica_wages",
+    "social_security_tax",
+    "medicare_tax",
+    "net_pay",
+)
+
+
+def periods_per_year(frequency):
+    if frequency not in PAY_FREQUENCIES:
+        raise ValueError(f"Unknown pay frequency {frequency!r}; expected one of {', '.join(PAY_FREQUENCIES)}")
+    return PAY_FREQUENCIES[frequency]
+
+
+def pay_dates(frequency, tax_year=tax.DEFAULT_TAX_YEAR):
+    """Dates of every paycheck in ``tax_year``."""
+    return pd.date_range(
+        start=f"{tax_year}-01-01",
+        periods=periods_per_year(frequency),
+        freq=_PAY_DATE_FREQUENCIES[frequency]
+    )
+
+
+def capped_social_security(fica_wages, wage_base=engine.SS_WAGE_BASE_ANNUAL):
+    """Social Security per period, with the wage base applied to year-to-date wages.
+
+    ``fica_wages`` holds one paycheck per element along its last axis. Each
+    check is taxed on the part of its wages that falls below the base once
+    earlier checks are counted.
+    """
+    year_to_date = np.minimum(np.cumsum(fica_wages, axis=-1), wage_base)
+    return np.diff(year_to_date, axis=-1, prepend=0.0) * engine.SOCIAL_SECURITY_RATE
+
+
+def compute_paychecks(
+    gross_income,
+    fsa_monthly,
+    retirement_percent,
+    state_withholding_percent,
+    federal_withholding_percent,
+    frequency=DEFAULT_PAY_FREQUENCY,
+    wage_base=engine.SS_WAGE_BASE_ANNUAL,
+):
+    """Every paycheck of the year for one or many employees.
+
+    Inputs are the monthly figures the page uses (scalars or one element per
+    employee). Each one is spread evenly over the year's pay periods, or
+    ``gross_income`` may already be an ``(employees, periods)`` array of
+    per-check gross pay, for bonuses or raises. Returns ``PAYCHECK_FIELDS``
+    as arrays with one column per paycheck.
+    """
+    periods = periods_per_year(frequency)
+
+    def per_employee(value):
+        # Trailing axis of length one, so it broadcasts across paychecks.
+        return np.asarray(value, dtype=float)[..., None]
+
+    gross_income = np.asarray(gross_income, dtype=float)
+    if gross_income.ndim > 1 and gross_income.shape[-1] == periods:
+        gross_pay = gross_income
+    else:
+        gross_pay = np.repeat(per_employee(gross_income) * (12.0 / periods), periods, axis=-1)
+    fsa = per_employee(fsa_monthly) * (12.0 / periods)
+    retirement = gross_pay * (per_employee(retirement_percent) / 100.0)
+    taxable_pay = np.maximum(0.0, gross_pay - fsa - retirement)
+    fica_wages = np.maximum(0.0, gross_pay - fsa)
+
+    result = {
+        "gross_pay": gross_pay,
+        "fsa": fsa,
+        "retirement": retirement,
+        "taxable_pay": taxable_pay,
+        "state_withholding": taxable_pay * (per_employee(state_withholding_percent) / 100.0),
+        "federal_withholding": taxable_pay * (per_employee(federal_withholding_percent) / 100.0),
+        "fica_wages": fica_wages,
+        "social_security_tax": capped_social_security(fica_wages, wage_base),
+        "medicare_tax": fica_wages * engine.MEDICARE_RATE,
+    }
+    result["net_pay"] = (
+        gross_pay
+        - fsa
+        - retirement
+        - result["state_withholding"]
+        - result["federal_withholding"]
+        - result["social_security_tax"]
+        - result["medicare_tax"]
+    )
+    shape = np.broadcast_shapes(*(np.shape(value) for value in result.values()))
+    return {name: np.broadcast_to(result[name], shape) for name in PAYCHECK_FIELDS}
+
+
+def paycheck_schedule(
+    gross_income,
+    fsa_monthly,
+    retirement_percent,
+    state_withholding_percent,
+    federal_withholding_percent,
+    frequency=DEFAULT_PAY_FREQUENCY,
+    tax_year=tax.DEFAULT_TAX_YEAR,
+):
+    """One employee's paychecks as a table, one row per pay date."""
+    paychecks = compute_paychecks(
+        gross_income,
+        fsa_monthly,
+        retirement_percent,
+        state_withholding_percent,
+        federal_withholding_percent,
+        frequency,
+    )
+    schedule = pd.DataFrame({name: values.reshape(-1) for name, values in paychecks.items()})
+    schedule.insert(0, "pay_date", pay_dates(frequency, tax_year))
+    schedule.insert(0, "paycheck", np.arange(1, len(schedule) + 1))
+    schedule["year_to_date_fica_wages"] = schedule["fica_wages"].cumsum()
+    return schedule
@@ -0,0 +1,226 @@
+"""Organization mode: budgets for a whole employee roster at once.
+
+A roster is a CSV or Parquet table with one row per employee. Headers are
+matched to the budget input names after lower-casing and replacing spaces
+with underscores, so ``Gross Income`` reads as ``gross_income``. Only
+``gross_income`` is required. Other amounts default to zero, and
+``filing_status``, ``residence_state`` and ``pay_frequency`` default to the
+app's defaults. An ``employee_id`` or ``name`` column, if present, labels
+the rows.
+
+``load_cohort`` runs ``engine.compute_budget`` over every row once and
+memoizes the result under a SHA-256 digest of the file. Filters then only
+slice that result, and ``summarize`` memoizes each filtered view's
+percentiles and histogram, so changing a filter never recomputes the cohort.
+"""
+import hashlib
+import io
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from budget import engine, payroll, state, tax
+from budget.cache import LRUCache
+
+cohort_cache = LRUCache(
+    int(os.environ.get("BUDGET_COHORT_CACHE_SIZE", "4")),
+    sizeof=lambda cohort: int(cohort.frame.memory_usage(deep=True).sum())
+)
+summary_cache = LRUCache(int(os.environ.get("BUDGET_SUMMARY_CACHE_SIZE", "64")))
+
+ID_COLUMNS = ("employee_id", "name")
+AMOUNT_COLUMNS = engine.INCOME_COLUMNS + engine.EXPENSE_COLUMNS
+FIGURE_LABELS = {
+    "net_main_income": "Net pay (monthly)",
+    "total_payroll_taxes": "Payroll taxes (monthly)",
+    "surplus": "Surplus (monthly)",
+    "estimated_refund": "Estimated refund (annual)",
+}
+PERCENTILES = (10, 25, 50, 75, 90)
+HISTOGRAM_BINS = 40
+LOWEST_ROWS = 25
+
+
+@dataclass(frozen=True)
+class Cohort:
+    """A roster with every employee's ``FIGURE_LABELS`` figures appended.
+
+    ``frame`` has an ``employee`` label column, the roster's input columns
+    and one column per figure; ``digest`` identifies the source file and
+    ``states`` lists the states that occur in it.
+    """
+
+    digest: str
+    file_name: str
+    frame: pd.DataFrame
+    states: tuple
+
+    def mask(self, filing_statuses=(), states=()):
+        """Rows in any of ``filing_statuses`` and any of ``states``; empty means all."""
+        keep = np.ones(len(self.frame), dtype=bool)
+        if filing_statuses:
+            keep &= self.frame["filing_status"].isin(filing_statuses).to_numpy()
+        if states:
+            keep &= self.frame["residence_state"].isin(states).to_numpy()
+        return keep
+
+    def find(self, label):
+        """Row position of the employee labelled ``label``, or ``None``."""
+        positions = np.flatnonzero(self.frame["employee"].to_numpy() == str(label).strip())
+        return int(positions[0]) if len(positions) else None
+
+
+@dataclass(frozen=True)
+class Summary:
+    employees: int
+    percentiles: pd.DataFrame
+    histogram: pd.DataFrame
+    lowest: pd.DataFrame
+
+
+def _normalize(name):
+    return "_".join(str(name).strip().lower().split())
+
+
+def _choices(frame, column, allowed, default, transform=None):
+    values = frame[column].fillna(default).astype(str).str.strip() if column in frame else default
+    if transform is not None and column in frame:
+        values = transform(values)
+    if column in frame:
+        unknown = sorted(set(values.unique()) - set(allowed))
+        if unknown:
+            raise ValueError(f"Unknown {column.replace('_', ' ')}: {', '.join(unknown[:5])}")
+    frame[column] = values
+
+
+def read_roster(handle, file_name, tax_year=tax.DEFAULT_TAX_YEAR):
+    """The roster in a CSV or Parquet file as a validated DataFrame.
+
+    Raises ``ValueError`` for unreadable files, a missing or blank
+    ``gross_income``, non-numeric amounts and unknown filing statuses,
+    states or pay frequencies.
+    """
+    try:
+        if Path(file_name).suffix.lower() in (".parquet", ".pq"):
+            frame = pd.read_parquet(handle)
+        else:
+            frame = pd.read_csv(handle, skipinitialspace=True)
+    except ImportError as e:
+        raise ValueError(f"Parquet support needs pyarrow: {e}") from e
+    except (OSError, ValueError) as e:
+        raise ValueError(f"could not read {file_name}: {e}") from e
+
+    frame.columns = [_normalize(column) for column in frame.columns]
+    if "gross_income" not in frame:
+        raise ValueError("the roster needs a gross_income column")
+    for column in AMOUNT_COLUMNS:
+        if column not in frame:
+            continue
+        try:
+            frame[column] = pd.to_numeric(frame[column]).astype(float)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"column {column} must be numeric: {e}") from e
+        if column != "gross_income":
+            frame[column] = frame[column].fillna(0.0)
+    missing = np.flatnonzero(frame["gross_income"].isna().to_numpy())
+    if len(missing):
+        raise ValueError(f"gross_income is blank on {len(missing):,} rows (first: row {missing[0] + 1})")
+
+    _choices(frame, "filing_status", engine.FILING_STATUSES, engine.DEFAULT_FILING_STATUS)
+    _choices(frame, "residence_state", tax.state_table(tax_year).states, tax.DEFAULT_STATE, lambda s: s.str.upper())
+    _choices(frame, "pay_frequency", payroll.PAY_FREQUENCIES, payroll.DEFAULT_PAY_FREQUENCY)
+
+    label = next((column for column in ID_COLUMNS if column in frame), None)
+    if label is None:
+        labels = pd.Series(np.arange(1, len(frame) + 1), index=frame.index).astype(str)
+    else:
+        labels = frame[label].astype(str).str.strip()
+    frame.insert(0, "employee", labels)
+    return frame.reset_index(drop=True)
+
+
+def cohort(roster, tax_year=tax.DEFAULT_TAX_YEAR, digest="", file_name=""):
+    """Every roster row's budget figures, through the vectorized ``engine`` path."""
+    figures = engine.compute_budget(roster, tax_year)
+    frame = pd.concat([roster, figures[list(FIGURE_LABELS)]], axis=1)
+    return Cohort(digest, file_name, frame, tuple(sorted(frame["residence_state"].unique())))
+
+
+def load_cohort(data, file_name, tax_year=tax.DEFAULT_TAX_YEAR):
+    """``cohort`` for roster file bytes, computed once per distinct file."""
+    digest = hashlib.sha256(data).hexdigest()
+
+    def render():
+        return cohort(read_roster(io.BytesIO(data), file_name, tax_year), tax_year, digest, file_name)
+
+    return cohort_cache.get_or_render((digest, Path(file_name).suffix.lower(), tax_year), render)
+
+
+def percentile_table(frame, figure, by="filing_status"):
+    """Employee count and ``PERCENTILES`` of ``figure`` per ``by`` group, plus everyone."""
+    levels = [level / 100 for level in PERCENTILES]
+    groups = [(name, values.to_numpy()) for name, values in frame.groupby(by, sort=True)[figure]]
+    groups.append(("All employees", frame[figure].to_numpy()))
+    return pd.DataFrame(
+        [
+            [name, len(values), *(np.quantile(values, levels) if len(values) else [np.nan] * len(levels))]
+            for name, values in groups
+        ],
+        columns=[by.replace("_", " ").capitalize(), "Employees", *(f"P{level}" for level in PERCENTILES)],
+    )
+
+
+def histogram(values, bins=HISTOGRAM_BINS):
+    """Bin edges and counts of ``values``, so charts plot bins rather than rows."""
+    counts, edges = np.histogram(values, bins=bins) if len(values) else (np.array([], dtype=int), np.zeros(1))
+    return pd.DataFrame({"Start": edges[:-1], "End": edges[1:], "Employees": counts})
+
+
+def summarize(cohort, figure, filing_statuses=(), states=()):
+    """Distribution of ``figure`` over the filtered cohort, memoized per file and filter."""
+    filing_statuses, states = tuple(sorted(filing_statuses)), tuple(sorted(states))
+
+    def render():
+        frame = cohort.frame[cohort.mask(filing_statuses, states)]
+        return Summary(
+            len(frame),
+            percentile_table(frame, figure),
+            histogram(frame[figure].to_numpy()),
+            frame.nsmallest(LOWEST_ROWS, figure)[
+                ["employee", "filing_status", "residence_state", "gross_income", *FIGURE_LABELS]
+            ],
+        )
+
+    if not cohort.digest:
+        return render()
+    return summary_cache.get_or_render((cohort.digest, figure, filing_statuses, states), render)
+
+
+def employee_record(cohort, position):
+    """The budget record (``budget.state`` format) for one roster row.
+
+    Inputs the roster leaves out follow ``state.record_inputs`` (zero
+    amounts, default choices), as ``read_roster`` does for the cohort, so
+    the budget page shows the same figures.
+    """
+    row = cohort.frame.iloc[position]
+    inputs = state.record_inputs(
+        {
+            key: str(row[key]) if isinstance(default, str) else float(row[key])
+            for key, default in state.INPUT_DEFAULTS.items()
+            if key in row.index
+        }
+    )
+    record = {"name": row["employee"], "inputs": inputs, "savings_goals": []}
+    additional_income = float(row.get("additional_income", 0.0))
+    additional_expenses = float(row.get("additional_expenses", 0.0))
+    record["additional_income"] = (
+        [{"Source": "Additional income", "Amount": additional_income}] if additional_income else []
+    )
+    record["additional_expenses"] = (
+        [{"Expense": "Additional expenses", "Amount": additional_expenses}] if additional_expenses else []
+    )
+    return record
@@ -0,0 +1,119 @@
+"""Compact, versioned snapshots of a budget record.
+
+A snapshot is a 4-byte header (``b"BDG"`` and a format version) followed by
+zlib-compressed JSON. Only inputs that differ from ``state.INPUT_DEFAULTS``
+are stored. Each list is stored column-wise, and goal timelines are
+recomputed on load instead of being stored, so a typical budget fits in a
+few hundred bytes. ``to_token``/``from_token`` wrap the same bytes in
+URL-safe base64 for share links.
+
+Decoding rejects unknown versions and damaged data with ``ValueError``. Add
+new versions to ``_DECODERS`` so old files and links keep loading.
+"""
+import base64
+import binascii
+import json
+import zlib
+
+from budget import state
+
+MAGIC = b"BDG"
+VERSION = 2
+# Longest token worth putting in a URL; browsers and proxies start truncating
+# somewhere past 2,000 characters.
+MAX_TOKEN_LENGTH = 1800
+
+_COLUMNS = {
+    "additional_income": ("Source", "Amount"),
+    "additional_expenses": ("Expense", "Amount"),
+    "savings_goals": ("Goal", "Target", "Monthly", "Deadline", "Priority"),
+}
+# Columns that may be null; a goal without a deadline or priority leaves them out.
+_OPTIONAL = {"Deadline", "Priority"}
+# Version 1 snapshots stored goals without the allocation settings.
+_V1_COLUMNS = {**_COLUMNS, "savings_goals": ("Goal", "Target", "Monthly")}
+
+
+def _cell(row, column):
+    return state.optional_amount(row.get(column)) if column in _OPTIONAL else row[column]
+
+
+def dumps(record):
+    """Snapshot bytes for a budget record (``state.collect`` output)."""
+    inputs = record.get("inputs", {})
+    payload = {
+        "i": {
+            key: inputs[key]
+            for key, default in state.INPUT_DEFAULTS.items()
+            if key in inputs and inputs[key] != default
+        },
+        "l": {
+            key: [[_cell(row, column) for row in record.get(key, [])] for column in columns]
+            for key, columns in _COLUMNS.items()
+            if record.get(key)
+        },
+    }
+    encoded = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return MAGIC + bytes([VERSION]) + zlib.compress(encoded, 9)
+
+
+def _decode(payload, list_columns):
+    inputs = dict(state.INPUT_DEFAULTS)
+    for key, value in payload.get("i", {}).items():
+        if key in inputs:
+            inputs[key] = str(value) if isinstance(inputs[key], str) else float(value)
+    record = {"inputs": inputs}
+    lists = payload.get("l", {})
+    for key, columns in list_columns.items():
+        values = lists.get(key, [[] for _ in columns])
+        if len(values) != len(columns) or len({len(column) for column in values}) > 1:
+            raise ValueError(f"snapshot list {key!r} is malformed")
+        rows = []
+        for row in zip(*values):
+            line = {columns[0]: row[0]}
+            for column, value in zip(columns[1:], row[1:]):
+                if value is not None or column not in _OPTIONAL:
+                    line[column] = float(value)
+            rows.append(line)
+        record[key] = rows
+    for goal in record["savings_goals"]:
+        goal["Months"] = state.goal_months(goal["Target"], goal["Monthly"])
+    return record
+
+
+def _decode_v1(payload):
+    return _decode(payload, _V1_COLUMNS)
+
+
+def _decode_v2(payload):
+    return _decode(payload, _COLUMNS)
+
+
+_DECODERS = {1: _decode_v1, 2: _decode_v2}
+
+
+def loads(data):
+    """The budget record stored in snapshot bytes."""
+    if len(data) < 4 or data[:3] != MAGIC:
+        raise ValueError("not a budget snapshot")
+    version = data[3]
+    if version not in _DECODERS:
+        raise ValueError(f"unsupported snapshot version {version}")
+    try:
+        payload = json.loads(zlib.decompress(data[4:]).decode("utf-8"))
+        return _DECODERS[version](payload)
+    except (zlib.error, UnicodeDecodeError, TypeError, KeyError, AttributeError, ValueError) as e:
+        raise ValueError(f"damaged budget snapshot: {e}") from e
+
+
+def to_token(record):
+    """URL-safe text form of a snapshot."""
+    return base64.urlsafe_b64encode(dumps(record)).rstrip(b"=").decode("ascii")
+
+
+def from_token(token):
+    try:
+        data = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"damaged budget link: {e}") from e
+    return loads(data)
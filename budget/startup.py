@@ -0,0 +1,165 @@
+"""Cold-start report for the Streamlit page.
+
+Starts a fresh interpreter under ``python -X importtime``, runs the page once
+headlessly (through Streamlit's ``AppTest``) and reports:
+
+* time to first paint: interpreter launch until the first script run ends,
+* import time per top-level package pulled in by the page itself,
+* whether any of ``LAZY_MODULES`` was imported before first paint.
+
+The exit status is non-zero when first paint exceeds the budget, a lazy
+module was imported eagerly, or the page raised, so the check can gate a
+deploy::
+
+    python -m budget.startup --budget 4.0
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+DEFAULT_SCRIPT = Path(__file__).resolve().parent.parent / "streamlit_app.py"
+DEFAULT_BUDGET_SECONDS = 4.0
+# Only needed by the Excel workbook or the report tab. matplotlib and PIL are
+# no longer used at all and must not creep back in.
+LAZY_MODULES = ("matplotlib", "xlsxwriter", "PIL", "altair")
+
+_RUN_MARKER = "budget.startup: first run"
+_CHILD = f"""
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+app = AppTest.from_file(sys.argv[1], default_timeout=120)
+sys.stderr.write({_RUN_MARKER!r} + "\\n")
+sys.stderr.flush()
+started = time.time()
+app.run()
+print(json.dumps({{
+    "run_started": started,
+    "run_finished": time.time(),
+    "exceptions": [exception.message for exception in app.exception],
+}}))
+"""
+
+
+@dataclass
+class StartupReport:
+    time_to_first_paint: float
+    script_run_seconds: float
+    page_import_seconds: float
+    package_seconds: dict = field(default_factory=dict)
+    eager_lazy_modules: tuple = ()
+    exceptions: tuple = ()
+
+    def over_budget(self, budget_seconds):
+        return self.time_to_first_paint > budget_seconds
+
+    def failures(self, budget_seconds):
+        problems = []
+        if self.over_budget(budget_seconds):
+            problems.append(
+                f"time to first paint {self.time_to_first_paint:.2f}s exceeds the {budget_seconds:.2f}s budget"
+            )
+        if self.eager_lazy_modules:
+            problems.append(f"imported before first paint: {', '.join(self.eager_lazy_modules)}")
+        problems.extend(f"page raised: {message}" for message in self.exceptions)
+        return problems
+
+    def to_dict(self):
+        return {
+            "time_to_first_paint": self.time_to_first_paint,
+            "script_run_seconds": self.script_run_seconds,
+            "page_import_seconds": self.page_import_seconds,
+            "package_seconds": self.package_seconds,
+            "eager_lazy_modules": list(self.eager_lazy_modules),
+            "exceptions": list(self.exceptions),
+        }
+
+
+def _parse_importtime(stderr):
+    """Cumulative seconds per top-level package imported after the run marker."""
+    package_seconds = defaultdict(float)
+    imported = set()
+    after_marker = False
+    for line in stderr.splitlines():
+        if line.strip() == _RUN_MARKER:
+            after_marker = True
+            continue
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, self_us, cumulative_us, name = (part for part in line.replace("import time:", "|", 1).split("|"))
+        module = name.strip()
+        imported.add(module.split(".")[0])
+        # Only outermost imports count towards a package, so nested imports
+        # are not double counted.
+        if after_marker and len(name) - len(name.lstrip()) == 1:
+            package_seconds[module.split(".")[0]] += int(cumulative_us) / 1_000_000
+    return dict(package_seconds), imported
+
+
+def measure(script=DEFAULT_SCRIPT, python=sys.executable):
+    """Run ``script`` once in a fresh interpreter and return a ``StartupReport``."""
+    script = Path(script).resolve()
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(script.parent), environment.get("PYTHONPATH")])
+    )
+    launched = time.time()
+    completed = subprocess.run(
+        [python, "-X", "importtime", "-c", _CHILD, str(script)],
+        capture_output=True,
+        text=True,
+        cwd=script.parent,
+        env=environment,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"startup probe failed:\n{completed.stderr[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    package_seconds, imported = _parse_importtime(completed.stderr)
+    return StartupReport(
+        time_to_first_paint=result["run_finished"] - launched,
+        script_run_seconds=result["run_finished"] - result["run_started"],
+        page_import_seconds=sum(package_seconds.values()),
+        package_seconds=dict(sorted(package_seconds.items(), key=lambda item: -item[1])),
+        eager_lazy_modules=tuple(module for module in LAZY_MODULES if module in imported),
+        exceptions=tuple(result["exceptions"]),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--script", default=str(DEFAULT_SCRIPT), help="Streamlit script to start")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=float(os.environ.get("BUDGET_STARTUP_SECONDS", DEFAULT_BUDGET_SECONDS)),
+        help="maximum seconds from launch to first paint",
+    )
+    parser.add_argument("--top", type=int, default=15, help="packages to list")
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = measure(args.script)
+    print(f"Time to first paint: {report.time_to_first_paint:.2f}s (budget {args.budget:.2f}s)")
+    print(f"First script run:    {report.script_run_seconds:.2f}s")
+    print(f"Imports by the page: {report.page_import_seconds:.2f}s")
+    for package, seconds in list(report.package_seconds.items())[:args.top]:
+        print(f"  {seconds * 1000:9.1f} ms  {package}")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(report.to_dict(), handle, indent=2)
+
+    problems = report.failures(args.budget)
+    for problem in problems:
+        print(f"FAIL: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
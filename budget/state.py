@@ -0,0 +1,101 @@
+"""Budget inputs as a plain record, independent of Streamlit.
+
+A budget record is a dict with the scalar widget values under ``"inputs"``
+and the three editable lists under their session-state names. The page keys
+its widgets by the ``INPUT_DEFAULTS`` names, so a record can be collected
+from, or applied to, ``st.session_state`` (or any mutable mapping) directly.
+
+Records written by hand, exported by other tools or built from a roster may
+leave inputs out. A missing amount counts as zero and a missing choice
+(filing status, state, pay frequency) takes its default, so an omitted
+expense never picks up the personal defaults below. Goals may also leave
+out the derived ``Months``; ``savings_goals`` fills it in.
+"""
+import copy
+
+from budget import categories, engine, payroll, tax
+
+INPUT_DEFAULTS = {
+    "gross_income": 5417.00,
+    "state_withholding_percent": 4.05,
+    "federal_withholding_percent": 12.0,
+    "fsa_monthly": 0.0,
+    "retirement_percent": 0.0,
+    "pay_frequency": payroll.DEFAULT_PAY_FREQUENCY,
+    "va_income": 4158.17,
+    **categories.DEFAULTS,
+    "filing_status": engine.DEFAULT_FILING_STATUS,
+    "residence_state": tax.DEFAULT_STATE
+}
+LIST_KEYS = ("additional_income", "additional_expenses", "savings_goals")
+
+
+def goal_months(target, monthly):
+    """Months to reach a goal's ``target`` at ``monthly``; 0 when nothing is contributed."""
+    return target / monthly if monthly > 0 else 0
+
+
+def optional_amount(value):
+    """``value`` as a float, or ``None`` for a cleared grid cell (``None`` or NaN)."""
+    return None if value is None or value != value else float(value)
+
+
+def record_inputs(inputs):
+    """Every ``INPUT_DEFAULTS`` value from ``inputs``: missing amounts are 0, missing choices default."""
+    return {
+        key: inputs.get(key, default if isinstance(default, str) else 0.0) for key, default in INPUT_DEFAULTS.items()
+    }
+
+
+def savings_goals(record):
+    """The record's goals, each with ``Months`` derived from Target and Monthly when it is missing."""
+    return [
+        goal if "Months" in goal else {**goal, "Months": goal_months(goal["Target"], goal["Monthly"])}
+        for goal in record.get("savings_goals", [])
+    ]
+
+
+def init(session_state):
+    """Fill in defaults for any input or list that is not set yet."""
+    for key, default in INPUT_DEFAULTS.items():
+        if key not in session_state:
+            session_state[key] = default
+    for key in LIST_KEYS:
+        if key not in session_state:
+            session_state[key] = []
+
+
+def collect(session_state):
+    """Snapshot the current inputs and lists as a budget record."""
+    record = {"inputs": {key: session_state.get(key, default) for key, default in INPUT_DEFAULTS.items()}}
+    for key in LIST_KEYS:
+        record[key] = copy.deepcopy(list(session_state.get(key, [])))
+    return record
+
+
+def apply(session_state, record):
+    """Overwrite inputs and lists from a record (see ``record_inputs`` for missing inputs)."""
+    for key, value in record_inputs(record.get("inputs", {})).items():
+        session_state[key] = value
+    lists = {**record, "savings_goals": savings_goals(record)}
+    for key in LIST_KEYS:
+        session_state[key] = copy.deepcopy(list(lists.get(key, [])))
+
+
+def graph_inputs(record):
+    """``budget.graph`` inputs for a record: its inputs plus the list totals."""
+    values = record_inputs(record.get("inputs", {}))
+    values["additional_income"] = sum(item["Amount"] for item in record.get("additional_income", []))
+    values["additional_expenses"] = sum(item["Amount"] for item in record.get("additional_expenses", []))
+    values["savings_monthly"] = sum(goal["Monthly"] for goal in record.get("savings_goals", []))
+    return values
+
+
+def keep(session_state):
+    """Re-store every input so its value outlives its widget.
+
+    Streamlit forgets a keyed widget's value after any run that does not
+    draw the widget, and with lazily rendered tabs only the open tab draws.
+    """
+    for key in INPUT_DEFAULTS:
+        session_state[key] = session_state[key]
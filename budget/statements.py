@@ -0,0 +1,256 @@
+"""Streaming import of bank and credit-card statements.
+
+Statements are read in fixed-size chunks (CSV through ``pandas.read_csv``,
+OFX/QFX through a line-oriented tag scanner), and each chunk is folded into
+running per-category, per-month totals before the next one is read. Memory
+therefore depends on the number of categories and months, not on the number
+of transactions. Outflows are matched to the app's expense lines by keyword;
+anything else keeps the statement's own category.
+"""
+import io
+import os
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from budget import categories as expense_categories
+
+CHUNK_ROWS = 100_000
+UNCATEGORIZED = "Uncategorized"
+
+LINE_KEYWORDS = expense_categories.KEYWORDS
+
+DATE_COLUMNS = ("date", "transaction date", "trans. date", "posted date", "posting date")
+AMOUNT_COLUMNS = ("amount", "transaction amount")
+DEBIT_COLUMNS = ("debit", "withdrawal", "withdrawals")
+CREDIT_COLUMNS = ("credit", "deposit", "deposits")
+DESCRIPTION_COLUMNS = ("description", "payee", "name", "merchant", "memo", "details")
+CATEGORY_COLUMNS = ("category", "type")
+
+_LINE_KEYS = np.array(list(LINE_KEYWORDS), dtype=object)
+# One named group per expense line, so a single regex pass finds the first
+# matching line for every description.
+_LINE_PATTERN = re.compile(
+    "|".join(
+        rf"(?P<{line}>\b(?:{'|'.join(re.escape(keyword) for keyword in keywords)}))"
+        for line, keywords in LINE_KEYWORDS.items()
+    )
+)
+_OFX_TAG = re.compile(r"<(/?)(\w+)>([^<\r\n]*)")
+
+
+@dataclass(frozen=True)
+class ImportResult:
+    """Monthly averages per category plus parse statistics.
+
+    ``categories`` has one row per category with the matched expense line
+    key in ``Line`` (``None`` when no line matched), the total outflow, and
+    the average over every month the statements span.
+    """
+
+    categories: pd.DataFrame
+    rows: int
+    bytes: int
+    seconds: float
+    months: int
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self):
+        return self.bytes / 1_000_000 / self.seconds if self.seconds else 0.0
+
+
+class _Accumulator:
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.lines = {}
+        self.first_month = None
+        self.last_month = None
+        self.rows = 0
+
+    def add(self, dates, amounts, descriptions, categories):
+        """Fold one chunk of outflows (positive amounts) into the totals."""
+        self.rows += len(dates)
+        keep = dates.notna() & (amounts > 0)
+        if not keep.any():
+            return
+        months = dates[keep].dt.to_period("M")
+        amounts = amounts[keep]
+        descriptions = descriptions[keep].fillna("").str.lower()
+        categories = categories[keep].fillna(UNCATEGORIZED).astype(str)
+
+        # Statements repeat the same merchants, so match each distinct
+        # description once and broadcast the result back to the rows.
+        codes, uniques = pd.factorize(descriptions)
+        found = pd.Series(uniques, dtype=object).str.extract(_LINE_PATTERN).notna().to_numpy()
+        unique_lines = np.where(found.any(axis=1), _LINE_KEYS[found.argmax(axis=1)], None)
+        line = pd.Series(unique_lines[codes], index=descriptions.index, dtype=object)
+        label = line.fillna(categories)
+
+        grouped = amounts.groupby([label, line.fillna(""), months]).sum()
+        for (category, line_key, _), total in grouped.items():
+            self.totals[category] += total
+            self.lines[category] = line_key or None
+
+        low, high = months.min(), months.max()
+        self.first_month = low if self.first_month is None else min(self.first_month, low)
+        self.last_month = high if self.last_month is None else max(self.last_month, high)
+
+    def result(self, size, seconds):
+        months = 0
+        if self.first_month is not None:
+            months = (self.last_month - self.first_month).n + 1
+        categories = pd.DataFrame(
+            {
+                "Category": list(self.totals),
+                "Line": [self.lines[category] for category in self.totals],
+                "Total": list(self.totals.values()),
+            }
+        )
+        categories["Monthly Average"] = categories["Total"] / months if months else 0.0
+        categories = categories.sort_values("Monthly Average", ascending=False, ignore_index=True)
+        return ImportResult(categories, self.rows, size, seconds, months)
+
+
+def _find(columns, candidates):
+    lowered = {column.strip().lower(): column for column in columns}
+    for candidate in candidates:
+        if candidate in lowered:
+            return lowered[candidate]
+    return None
+
+
+def _parse_dates(values):
+    # Statements repeat the same few hundred dates, so parse each distinct
+    # string once; missing values come back as NaT.
+    codes, uniques = pd.factorize(values)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), errors="coerce").to_numpy()
+    parsed = np.append(parsed, np.datetime64("NaT"))
+    return pd.Series(parsed[codes], index=values.index)
+
+
+def _open_binary(source):
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, "rb"), True
+    if isinstance(source, bytes):
+        return io.BytesIO(source), True
+    return source, False
+
+
+def _iter_csv(handle, outflows_negative, chunk_rows):
+    reader = pd.read_csv(handle, chunksize=chunk_rows, dtype=str, skipinitialspace=True)
+    columns = None
+    for chunk in reader:
+        if columns is None:
+            date = _find(chunk.columns, DATE_COLUMNS)
+            amount = _find(chunk.columns, AMOUNT_COLUMNS)
+            debit = _find(chunk.columns, DEBIT_COLUMNS)
+            credit = _find(chunk.columns, CREDIT_COLUMNS)
+            description = _find(chunk.columns, DESCRIPTION_COLUMNS)
+            category = _find(chunk.columns, CATEGORY_COLUMNS)
+            if date is None or (amount is None and debit is None):
+                raise ValueError(
+                    "Statement needs a date column and an amount (or debit) column; "
+                    f"found {', '.join(chunk.columns)}"
+                )
+            columns = (date, amount, debit, credit, description, category)
+        date, amount, debit, credit, description, category = columns
+
+        def numbers(name):
+            if name is None:
+                return pd.Series(0.0, index=chunk.index)
+            cleaned = chunk[name].str.replace(r"[$,\s]", "", regex=True)
+            cleaned = cleaned.str.replace(r"^\((.*)\)$", r"-\1", regex=True)
+            return pd.to_numeric(cleaned, errors="coerce").fillna(0.0)
+
+        if amount is not None:
+            outflow = numbers(amount)
+            if outflows_negative:
+                outflow = -outflow
+        else:
+            outflow = numbers(debit).abs() - numbers(credit).abs()
+
+        missing = pd.Series(None, index=chunk.index, dtype=object)
+        yield (
+            _parse_dates(chunk[date]),
+            outflow,
+            chunk[description] if description is not None else missing,
+            chunk[category] if category is not None else missing,
+        )
+
+
+def _iter_ofx(handle, chunk_rows):
+    text = io.TextIOWrapper(handle, encoding="latin-1", newline="")
+    rows = []
+    current = None
+
+    def flush():
+        frame = pd.DataFrame(rows, columns=["DTPOSTED", "TRNAMT", "NAME", "MEMO"])
+        return (
+            pd.to_datetime(frame["DTPOSTED"].str[:8], format="%Y%m%d", errors="coerce"),
+            -pd.to_numeric(frame["TRNAMT"], errors="coerce").fillna(0.0),
+            (frame["NAME"].fillna("") + " " + frame["MEMO"].fillna("")).str.strip(),
+            pd.Series(None, index=frame.index, dtype=object),
+        )
+
+    try:
+        for raw_line in text:
+            for closing, tag, value in _OFX_TAG.findall(raw_line):
+                tag = tag.upper()
+                if tag == "STMTTRN":
+                    if closing and current is not None:
+                        rows.append(current)
+                        current = None
+                        if len(rows) >= chunk_rows:
+                            yield flush()
+                            rows.clear()
+                    elif not closing:
+                        current = {}
+                elif current is not None and not closing and tag in ("DTPOSTED", "TRNAMT", "NAME", "MEMO"):
+                    current[tag] = value.strip()
+        if rows:
+            yield flush()
+    finally:
+        text.detach()
+
+
+def import_statement(source, file_name=None, outflows_negative=True, chunk_rows=CHUNK_ROWS):
+    """Aggregate one statement file into monthly averages per category.
+
+    ``source`` is a path, raw bytes or a binary file object (such as a
+    Streamlit upload). The format follows the file extension: ``.ofx`` and
+    ``.qfx`` are parsed as OFX, everything else as CSV. For CSVs with a single
+    signed amount column, ``outflows_negative`` says whether spending is
+    negative (typical for bank exports) or positive (many card exports).
+    """
+    return import_statements([(source, file_name)], outflows_negative, chunk_rows)
+
+
+def import_statements(sources, outflows_negative=True, chunk_rows=CHUNK_ROWS):
+    """Aggregate several ``(source, file_name)`` statements into one result."""
+    accumulator = _Accumulator()
+    size = 0
+    started = time.perf_counter()
+    for source, file_name in sources:
+        file_name = file_name or getattr(source, "name", None) or str(source)
+        handle, owned = _open_binary(source)
+        try:
+            start_position = handle.tell() if handle.seekable() else 0
+            if os.path.splitext(str(file_name))[1].lower() in (".ofx", ".qfx"):
+                chunks = _iter_ofx(handle, chunk_rows)
+            else:
+                chunks = _iter_csv(handle, outflows_negative, chunk_rows)
+            for dates, amounts, descriptions, categories in chunks:
+                accumulator.add(dates, amounts, descriptions, categories)
+            size += handle.tell() - start_position if handle.seekable() else 0
+        finally:
+            if owned:
+                handle.close()
+    return accumulator.result(size, time.perf_counter() - started)
@@ -0,0 +1,218 @@
+"""SQLite persistence for named budgets.
+
+The database runs in WAL mode so page loads keep reading while a save is in
+flight. Connections come from a small pool shared by every session. Each
+budget is one row of scalar inputs (JSON) plus one row per income, expense or
+goal line. Listing and loading go through the ``(owner, updated_at)`` and
+``(owner, name)`` indexes, so page load stays flat as an owner's saved
+budgets grow. ``DebouncedWriter`` coalesces rapid edits into one batched
+transaction.
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from budget import state
+
+DEFAULT_DB_PATH = os.environ.get("BUDGET_DB_PATH", "budgets.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS budgets (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    name TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    UNIQUE (owner, name)
+);
+CREATE INDEX IF NOT EXISTS budgets_owner_updated ON budgets (owner, updated_at DESC);
+CREATE TABLE IF NOT EXISTS budget_lines (
+    budget_id INTEGER NOT NULL REFERENCES budgets (id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    amount REAL NOT NULL,
+    target REAL,
+    deadline REAL,
+    priority REAL,
+    PRIMARY KEY (budget_id, kind, position)
+);
+"""
+# Goal settings stored in their own nullable columns; added after the first
+# release, so older databases get them on open.
+GOAL_SETTINGS = {"deadline": "Deadline", "priority": "Priority"}
+
+# Session list name -> (line kind, name field, amount field, target field)
+LINE_KINDS = {
+    "additional_income": ("income", "Source", "Amount", None),
+    "additional_expenses": ("expense", "Expense", "Amount", None),
+    "savings_goals": ("goal", "Goal", "Monthly", "Target"),
+}
+
+
+class BudgetStore:
+    """Load, save and list budgets by ``(owner, name)``."""
+
+    def __init__(self, path=DEFAULT_DB_PATH, pool_size=4):
+        self.path = path
+        self._pool = queue.Queue()
+        for _ in range(pool_size):
+            self._pool.put(self._connect())
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+            existing = {row[1] for row in connection.execute("PRAGMA table_info(budget_lines)")}
+            for column in GOAL_SETTINGS:
+                if column not in existing:
+                    connection.execute(f"ALTER TABLE budget_lines ADD COLUMN {column} REAL")
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute("PRAGMA foreign_keys=ON")
+        return connection
+
+    @contextmanager
+    def _connection(self):
+        connection = self._pool.get()
+        try:
+            with connection:
+                yield connection
+        finally:
+            self._pool.put(connection)
+
+    def list_budgets(self, owner):
+        """``(name, updated_at)`` pairs for ``owner``, most recent first."""
+        with self._connection() as connection:
+            return connection.execute(
+                "SELECT name, updated_at FROM budgets WHERE owner = ? ORDER BY updated_at DESC",
+                (owner,)
+            ).fetchall()
+
+    def load(self, owner, name):
+        """The budget record saved under ``name``, or ``None``."""
+        with self._connection() as connection:
+            row = connection.execute(
+                "SELECT id, inputs FROM budgets WHERE owner = ? AND name = ?",
+                (owner, name)
+            ).fetchone()
+            if row is None:
+                return None
+            budget_id, inputs = row
+            lines = connection.execute(
+                "SELECT kind, name, amount, target, deadline, priority FROM budget_lines "
+                "WHERE budget_id = ? ORDER BY kind, position",
+                (budget_id,)
+            ).fetchall()
+
+        record = {"inputs": json.loads(inputs)}
+        by_kind = {kind: (list_key, name_field, amount_field, target_field)
+                   for list_key, (kind, name_field, amount_field, target_field) in LINE_KINDS.items()}
+        for list_key in LINE_KINDS:
+            record[list_key] = []
+        for kind, line_name, amount, target, *settings in lines:
+            list_key, name_field, amount_field, target_field = by_kind[kind]
+            item = {name_field: line_name, amount_field: amount}
+            if target_field:
+                item[target_field] = target
+                item["Months"] = state.goal_months(target, amount)
+                item.update(
+                    (field, value) for field, value in zip(GOAL_SETTINGS.values(), settings) if value is not None
+                )
+            record[list_key].append(item)
+        return record
+
+    def save(self, owner, name, record):
+        self.save_many([(owner, name, record)])
+
+    def save_many(self, items):
+        """Write several ``(owner, name, record)`` budgets in one transaction."""
+        now = time.time()
+        with self._connection() as connection:
+            for owner, name, record in items:
+                budget_id = connection.execute(
+                    "INSERT INTO budgets (owner, name, inputs, updated_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (owner, name) DO UPDATE SET "
+                    "inputs = excluded.inputs, updated_at = excluded.updated_at "
+                    "RETURNING id",
+                    (owner, name, json.dumps(record.get("inputs", {})), now)
+                ).fetchone()[0]
+                connection.execute("DELETE FROM budget_lines WHERE budget_id = ?", (budget_id,))
+                connection.executemany(
+                    "INSERT INTO budget_lines (budget_id, kind, position, name, amount, target, deadline, priority) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            budget_id,
+                            kind,
+                            position,
+                            item[name_field],
+                            float(item[amount_field]),
+                            float(item[target_field]) if target_field else None,
+                            *(state.optional_amount(item.get(field)) for field in GOAL_SETTINGS.values())
+                        )
+                        for list_key, (kind, name_field, amount_field, target_field) in LINE_KINDS.items()
+                        for position, item in enumerate(record.get(list_key, []))
+                    ]
+                )
+
+    def delete(self, owner, name):
+        with self._connection() as connection:
+            connection.execute("DELETE FROM budgets WHERE owner = ? AND name = ?", (owner, name))
+
+    def close(self):
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+class DebouncedWriter:
+    """Coalesce saves and flush them together once edits pause.
+
+    ``schedule`` keeps only the latest record per ``(owner, name)`` and
+    restarts a ``delay``-second timer; when it fires, every pending budget is
+    written in a single ``save_many`` transaction. ``cancel`` drops a
+    budget's pending save, e.g. before deleting it.
+    """
+
+    def __init__(self, store, delay=2.0):
+        self.store = store
+        self.delay = delay
+        self._pending = {}
+        self._timer = None
+        self._lock = threading.Lock()
+        # Held for a whole flush, so cancel() waits out a write in progress.
+        self._write_lock = threading.Lock()
+
+    def schedule(self, owner, name, record):
+        with self._lock:
+            self._pending[(owner, name)] = record
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    def cancel(self, owner, name):
+        """Forget the pending save of ``(owner, name)``; returns after any write in progress."""
+        with self._write_lock, self._lock:
+            self._pending.pop((owner, name), None)
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if pending:
+                self.store.save_many(
+                    [(owner, name, record) for (owner, name), record in pending.items()]
+                )
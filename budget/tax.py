@@ -0,0 +1,200 @@
+"""Table-driven, vectorized income tax brackets.
+
+Bracket data is read from ``budget/data`` once per process and turned into
+padded NumPy tables holding each bracket's lower threshold, marginal rate and
+the cumulative tax owed at that threshold. Tax for any number of incomes is
+then ``base_tax[j] + (income - threshold[j]) * rate[j]`` for the bracket ``j``
+each income falls in, evaluated for the whole array at once.
+
+Federal schedules are keyed by filing status. State schedules are keyed by
+state and filing status together, one table row per pair, so every state
+for one household and one state for many households go through the same
+lookup as the federal tax.
+"""
+import functools
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path(__file__).parent / "data"
+DEFAULT_TAX_YEAR = 2024
+DEFAULT_STATE = "MI"
+
+
+@dataclass(frozen=True)
+class BracketTable:
+    """A set of bracket schedules stacked into padded arrays, one row per key.
+
+    Unused trailing brackets are padded with an infinite threshold so they
+    never match.
+    """
+
+    keys: tuple
+    thresholds: np.ndarray
+    rates: np.ndarray
+    base_tax: np.ndarray
+    deductions: np.ndarray
+    credits: np.ndarray
+
+    @classmethod
+    def from_schedules(cls, schedules, deductions=None, credits=None):
+        """Build from ``{key: [(lower_threshold, rate), ...]}``."""
+        keys = tuple(schedules)
+        width = max(len(brackets) for brackets in schedules.values())
+        thresholds = np.full((len(keys), width), np.inf)
+        rates = np.zeros((len(keys), width))
+        base_tax = np.zeros((len(keys), width))
+        for row, key in enumerate(keys):
+            lower, rate = np.asarray(schedules[key], dtype=float).T
+            if lower[0] != 0.0 or np.any(np.diff(lower) <= 0):
+                raise ValueError(f"Brackets for {key!r} must start at 0 and increase")
+            thresholds[row, :len(lower)] = lower
+            rates[row, :len(rate)] = rate
+            base_tax[row, 1:len(lower)] = np.cumsum(np.diff(lower) * rate[:-1])
+
+        def per_key(amounts):
+            if amounts is None:
+                return np.zeros(len(keys))
+            return np.array([float(amounts[key]) for key in keys])
+
+        return cls(keys, thresholds, rates, base_tax, per_key(deductions), per_key(credits))
+
+    def rows(self, keys):
+        """Row index for each key; raises ``ValueError`` on unknown keys."""
+        return _rows(self.keys, keys, "bracket key")
+
+    def deduction(self, keys):
+        result = self.deductions[self.rows(keys)]
+        return result[()] if result.ndim == 0 else result
+
+    def tax(self, income, keys):
+        """Tax on ``income`` (scalar or array) under each row's schedule."""
+        return self.tax_rows(income, self.rows(keys))
+
+    def tax_rows(self, income, rows):
+        """``tax`` for row indexes already looked up with ``rows``."""
+        clipped = np.maximum(np.asarray(income, dtype=float), 0.0)
+        rows = np.asarray(rows)
+        if rows.ndim == 0:
+            # One schedule for every income: a binary search per income.
+            bracket = np.searchsorted(self.thresholds[rows], clipped, side="right") - 1
+            rows = np.broadcast_to(rows, clipped.shape)
+        else:
+            clipped, rows = np.broadcast_arrays(clipped, rows)
+            bracket = np.sum(clipped[..., None] >= self.thresholds[rows], axis=-1) - 1
+        picked = (rows, bracket)
+        result = (
+            self.base_tax[picked]
+            + (clipped - self.thresholds[picked]) * self.rates[picked]
+        )
+        return result[()] if result.ndim == 0 else result
+
+
+def _rows(index, keys, kind):
+    # Hash each distinct key once; households repeat a handful of keys.
+    keys = np.asarray(keys, dtype=object)
+    codes, distinct = pd.factorize(keys.ravel(), use_na_sentinel=False)
+    rows = pd.Index(index).get_indexer(distinct)[codes].reshape(keys.shape)
+    if np.any(rows < 0):
+        unknown = sorted({str(key) for key in keys[rows < 0].ravel()})
+        raise ValueError(f"Unknown {kind}: {', '.join(unknown)}")
+    return rows
+
+
+def _load(name):
+    with open(DATA_DIR / name, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+@functools.lru_cache(maxsize=None)
+def federal_table(tax_year=DEFAULT_TAX_YEAR):
+    """Federal brackets and standard deductions by filing status."""
+    years = _load("federal_brackets.json")
+    if str(tax_year) not in years:
+        raise ValueError(f"No federal brackets for tax year {tax_year}")
+    statuses = years[str(tax_year)]
+    return BracketTable.from_schedules(
+        {status: entry["brackets"] for status, entry in statuses.items()},
+        {status: entry["standard_deduction"] for status, entry in statuses.items()},
+    )
+
+
+def federal_tax(annual_taxable_income, filing_status, tax_year=DEFAULT_TAX_YEAR):
+    """Federal income tax on annual taxable income, vectorized over households."""
+    return federal_table(tax_year).tax(annual_taxable_income, filing_status)
+
+
+def standard_deduction(filing_status, tax_year=DEFAULT_TAX_YEAR):
+    return federal_table(tax_year).deduction(filing_status)
+
+
+@dataclass(frozen=True)
+class StateTable:
+    """Every state's brackets, one ``BracketTable`` row per (state, filing status).
+
+    Row ``state_index * len(statuses) + status_index`` holds that pair's
+    schedule. Its deduction is the standard deduction plus personal
+    exemptions, and its credit is a flat nonrefundable credit (personal or
+    exemption credits, in the states that use those instead).
+    """
+
+    states: tuple
+    names: dict
+    statuses: tuple
+    brackets: BracketTable
+
+    def rows(self, state, filing_status):
+        state_rows = _rows(self.states, state, "state")
+        status_rows = _rows(self.statuses, filing_status, "filing status")
+        return state_rows * len(self.statuses) + status_rows
+
+    def deduction(self, state, filing_status):
+        result = self.brackets.deductions[self.rows(state, filing_status)]
+        return result[()] if result.ndim == 0 else result
+
+    def tax(self, annual_taxable_base, state, filing_status):
+        rows = self.rows(state, filing_status)
+        taxable = np.maximum(0.0, np.asarray(annual_taxable_base, dtype=float) - self.brackets.deductions[rows])
+        result = np.maximum(0.0, self.brackets.tax_rows(taxable, rows) - self.brackets.credits[rows])
+        return result[()] if result.ndim == 0 else result
+
+
+@functools.lru_cache(maxsize=None)
+def state_table(tax_year=DEFAULT_TAX_YEAR):
+    """State brackets, deductions, exemptions and credits by state and filing status.
+
+    In the data file a state lists only the statuses it treats differently:
+    a missing status falls back to ``"Single"``, and a state with no entries
+    has no income tax on wages.
+    """
+    years = _load("state_brackets.json")
+    if str(tax_year) not in years:
+        raise ValueError(f"No state brackets for tax year {tax_year}")
+    states = years[str(tax_year)]
+    statuses = federal_table(tax_year).keys
+    schedules, deductions, credits = {}, {}, {}
+    for state, entries in states.items():
+        for status in statuses:
+            entry = entries.get(status) or entries.get("Single") or {}
+            key = f"{state}/{status}"
+            schedules[key] = entry.get("brackets", [[0, 0.0]])
+            deductions[key] = entry.get("standard_deduction", 0.0) + entry.get("exemption", 0.0)
+            credits[key] = entry.get("credit", 0.0)
+    return StateTable(
+        tuple(states),
+        {state: entries["name"] for state, entries in states.items()},
+        statuses,
+        BracketTable.from_schedules(schedules, deductions, credits),
+    )
+
+
+def state_tax(annual_taxable_base, state, filing_status, tax_year=DEFAULT_TAX_YEAR):
+    """State income tax on the annual taxable base, vectorized over households and states."""
+    return state_table(tax_year).tax(annual_taxable_base, state, filing_status)
+
+
+def state_deduction(state, filing_status, tax_year=DEFAULT_TAX_YEAR):
+    return state_table(tax_year).deduction(state, filing_status)
@@ -0,0 +1,211 @@
+"""Per-stage timing spans for script runs.
+
+``span(name)`` times a block inside the trace that is currently running, and
+does nothing when no trace is running. ``span(name, record=True)`` starts a
+trace if none is running, so the page opens one per full run and each tab
+fragment opens its own when it reruns alone. When a trace ends, its stage
+timings go to the shared ``recorder``. The recorder:
+
+* keeps a window of recent samples per stage for p50/p95 across sessions,
+* appends one JSON line per run to a size-rotated log,
+* rewrites a Prometheus text-format file for a local scraper, including
+  the lines of every callable in ``metric_sources`` (the job pool's).
+
+Disabled spans return a shared no-op object after a single context lookup.
+Set ``BUDGET_TRACE=1`` to record every session. Otherwise only sessions that
+turn on the debug panel are recorded.
+"""
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+import pandas as pd
+
+ENABLED = os.environ.get("BUDGET_TRACE", "").lower() in ("1", "true", "yes", "on")
+DEFAULT_LOG_PATH = os.environ.get("BUDGET_TRACE_LOG", "budget-trace.jsonl")
+DEFAULT_METRICS_PATH = os.environ.get("BUDGET_TRACE_METRICS", "budget-metrics.prom")
+LOG_MAX_BYTES = 5_000_000
+LOG_BACKUPS = 3
+WINDOW = 1000
+QUANTILES = (0.5, 0.95)
+
+_current = contextvars.ContextVar("budget_trace", default=None)
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def start(self):
+        return self
+
+    def stop(self, completed=True):
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Trace:
+    """Stage timings for one run; a stage entered twice accumulates."""
+
+    def __init__(self, root, session=None):
+        self.root = root
+        self.session = session
+        self.started = time.time()
+        self.stages = defaultdict(float)
+
+    def to_dict(self):
+        return {
+            "time": self.started,
+            "session": self.session,
+            "root": self.root,
+            "seconds": self.stages[self.root],
+            "stages": dict(self.stages),
+        }
+
+
+class Span:
+    def __init__(self, name, trace, recorder):
+        self.name = name
+        self.trace = trace
+        self.recorder = recorder
+        self._token = None
+        self._started = None
+
+    def start(self):
+        if self.recorder is not None:
+            self._token = _current.set(self.trace)
+        self._started = time.perf_counter()
+        return self
+
+    def stop(self, completed=True):
+        """End the span; a root span records and returns its ``Trace``.
+
+        Runs cut short by an exception (Streamlit interrupts a run to start
+        a newer one) pass ``completed=False`` and are not recorded.
+        """
+        self.trace.stages[self.name] += time.perf_counter() - self._started
+        if self.recorder is None:
+            return None
+        _current.reset(self._token)
+        if not completed:
+            return None
+        self.recorder.record(self.trace)
+        return self.trace
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, *exc_info):
+        self.stop(completed=exc_type is None)
+        return False
+
+
+def span(name, record=False, session=None, to=None):
+    """Time ``name`` in the running trace.
+
+    With ``record=True`` and no trace running, start one rooted at ``name``
+    that is handed to ``to`` (the module ``recorder`` by default) when it ends.
+    """
+    trace = _current.get()
+    if trace is not None:
+        return Span(name, trace, None)
+    if not record:
+        return _NULL_SPAN
+    return Span(name, Trace(name, session), to or recorder)
+
+
+def start(name, record, session=None, to=None):
+    """Start a root span for a whole script run, already entered.
+
+    A run that Streamlit interrupted never reached its ``stop``, so any trace
+    still marked as running is dropped first.
+    """
+    _current.set(None)
+    return span(name, record, session, to).start()
+
+
+class Recorder:
+    """Collects finished traces from every session in the process."""
+
+    def __init__(self, log_path=DEFAULT_LOG_PATH, metrics_path=DEFAULT_METRICS_PATH, window=WINDOW):
+        self.log_path = log_path
+        self.metrics_path = metrics_path
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._totals = defaultdict(float)
+        self._counts = defaultdict(int)
+        self._lock = threading.Lock()
+        self._log = None
+        self.metric_sources = []
+
+    def _logger(self):
+        if self._log is None:
+            handler = logging.handlers.RotatingFileHandler(
+                self.log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger(f"budget.tracing.{id(self)}")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            logger.addHandler(handler)
+            self._log = logger
+        return self._log
+
+    def record(self, trace):
+        with self._lock:
+            for stage, seconds in trace.stages.items():
+                self._samples[stage].append(seconds)
+                self._totals[stage] += seconds
+                self._counts[stage] += 1
+            if self.log_path:
+                self._logger().info(json.dumps(trace.to_dict()))
+            if self.metrics_path:
+                self._write_metrics()
+
+    def write_metrics(self):
+        """Rewrite the metrics file now, for metrics that change between runs."""
+        if self.metrics_path:
+            with self._lock:
+                self._write_metrics()
+
+    def summary(self):
+        """Count, p50 and p95 (milliseconds) per stage over the recent window."""
+        with self._lock:
+            samples = {stage: np.array(values) for stage, values in self._samples.items()}
+            counts = dict(self._counts)
+        rows = [
+            (stage, counts[stage], *(np.quantile(values, QUANTILES) * 1000))
+            for stage, values in sorted(samples.items())
+        ]
+        return pd.DataFrame(rows, columns=["Stage", "Runs", "p50 (ms)", "p95 (ms)"])
+
+    def _write_metrics(self):
+        lines = [
+            f"# HELP budget_stage_seconds Wall time per script stage (quantiles over the last "
+            f"{WINDOW} runs).",
+            "# TYPE budget_stage_seconds summary",
+        ]
+        for stage, values in sorted(self._samples.items()):
+            for quantile, seconds in zip(QUANTILES, np.quantile(np.array(values), QUANTILES)):
+                lines.append(f'budget_stage_seconds{{stage="{stage}",quantile="{quantile}"}} {seconds:.6f}')
+            lines.append(f'budget_stage_seconds_sum{{stage="{stage}"}} {self._totals[stage]:.6f}')
+            lines.append(f'budget_stage_seconds_count{{stage="{stage}"}} {self._counts[stage]}')
+        for source in self.metric_sources:
+            lines.extend(source())
+        partial = f"{self.metrics_path}.tmp"
+        with open(partial, "w", encoding="utf-8") as handle:
+            handle.write("\n".join(lines) + "\n")
+        os.replace(partial, self.metrics_path)
+
+
+recorder = Recorder()
@@ -0,0 +1,91 @@
+"""Solve for the federal withholding rate that brings the refund to zero.
+
+The refund is evaluated for a whole grid of withholding rates in one call to
+the engine, which broadcasts the rates against a single household. Because
+the refund is linear in the withholding rate, interpolating between the two
+grid points that bracket zero gives the exact break-even rate.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from budget import engine, tax
+
+MAX_FEDERAL_WITHHOLDING_PERCENT = 40.0
+
+
+@dataclass(frozen=True)
+class WithholdingSolution:
+    rate_percent: float
+    refund: float
+    rates_percent: np.ndarray
+    refunds: np.ndarray
+
+
+def refund_curve(
+    rates_percent,
+    gross_income,
+    fsa_monthly,
+    retirement_percent,
+    state_withholding_percent,
+    filing_status,
+    residence_state=tax.DEFAULT_STATE,
+):
+    """Estimated annual refund for each federal withholding rate in ``rates_percent``."""
+    payroll = engine.compute_payroll(
+        gross_income,
+        fsa_monthly,
+        retirement_percent,
+        state_withholding_percent,
+        np.asarray(rates_percent, dtype=float),
+    )
+    return engine.compute_annual_tax(
+        payroll, filing_status, residence_state=residence_state
+    )["estimated_refund"]
+
+
+def solve_zero_refund(
+    gross_income,
+    fsa_monthly,
+    retirement_percent,
+    state_withholding_percent,
+    filing_status,
+    residence_state=tax.DEFAULT_STATE,
+    max_percent=MAX_FEDERAL_WITHHOLDING_PERCENT,
+    points=401,
+):
+    """Federal withholding rate whose refund is closest to zero, plus the curve.
+
+    The state withholding rate and state tax are held fixed. If no rate in ``[0, max_percent]`` reaches
+    zero, the endpoint with the smallest absolute refund is returned.
+    """
+    rates = np.linspace(0.0, max_percent, points)
+    refunds = refund_curve(
+        rates,
+        gross_income,
+        fsa_monthly,
+        retirement_percent,
+        state_withholding_percent,
+        filing_status,
+        residence_state,
+    )
+
+    crossings = np.flatnonzero(np.signbit(refunds[:-1]) != np.signbit(refunds[1:]))
+    if crossings.size:
+        i = crossings[0]
+        span = refunds[i + 1] - refunds[i]
+        fraction = 0.0 if span == 0 else -refunds[i] / span
+        rate = float(rates[i] + fraction * (rates[i + 1] - rates[i]))
+    else:
+        rate = float(rates[np.argmin(np.abs(refunds))])
+
+    refund = float(refund_curve(
+        rate,
+        gross_income,
+        fsa_monthly,
+        retirement_percent,
+        state_withholding_percent,
+        filing_status,
+        residence_state,
+    ))
+    return WithholdingSolution(rate, refund, rates, refunds)
@@ -1,13 +1,37 @@
+import atexit
+import functools
+import uuid
+
 import streamlit as st
 import pandas as pd
-import io
-import xlsxwriter
-import matplotlib.pyplot as plt
-import matplotlib.patches as mpatches
-from PIL import Image
+
+from budget import (
+    allocation, categories, engine, export, graph, jobs, payroll, roster, simulation, snapshot, state,
+    statements, storage, tax, tracing, withholding
+)
 
 st.set_page_config(page_title="Budget Tool", layout="centered")
 
+
+def tracing_enabled():
+    return tracing.ENABLED or st.session_state.get("trace_stages", False)
+
+
+def trace_session():
+    return st.session_state.setdefault("trace_session", uuid.uuid4().hex[:8])
+
+
+def traced(function):
+    """Time ``function`` as a stage, or as its own trace when a fragment reruns alone."""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with tracing.span(function.__name__, tracing_enabled(), trace_session()):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+page_trace = tracing.start("page", tracing_enabled(), trace_session())
+
 # Custom theme with Michigan colors
 st.markdown("""
     <style>
@@ -110,65 +134,295 @@ st.markdown("""
 # 🚀 Header
 header_col1, header_col2 = st.columns([1, 6])
 with header_col1:
-    st.image(
-        "https://cdn.worldvectorlogo.com/logos/university-of-michigan-3.svg",
-        width=72
-    )
+    st.markdown('<img src="app/static/logo.svg" width="72" alt="Budgetary Tool logo">', unsafe_allow_html=True)
 with header_col2:
     st.markdown("<h1>Budgetary Tool</h1>", unsafe_allow_html=True)
     st.caption("Track your budget, launch your goals, and orbit financial freedom.")
 
-tab_income, tab_expenses, tab_savings, tab_report = st.tabs(
-    ["Income", "Expenses", "Savings Goals", "Visuals & Export"]
-)
+SHARE_PARAM = "budget"
+
+
+def reset_line_editors():
+    """Start every line grid afresh, dropping edits already applied to the lists."""
+    st.session_state.line_editor_version = st.session_state.get("line_editor_version", 0) + 1
+
+
+def restore_shared_budget():
+    """Open the budget in a share link once per session, before any widget is drawn."""
+    token = st.query_params.get(SHARE_PARAM)
+    if not token or token == st.session_state.get("restored_share_token"):
+        return
+    st.session_state.restored_share_token = token
+    try:
+        state.apply(st.session_state, snapshot.from_token(token))
+    except ValueError as e:
+        st.session_state.snapshot_error = f"Could not open the shared budget: {e}"
+        return
+    reset_line_editors()
+
+
+restore_shared_budget()
+state.init(st.session_state)
+state.keep(st.session_state)
+
+
+@st.cache_resource
+def get_budget_store():
+    budget_store = storage.BudgetStore()
+    budget_writer = storage.DebouncedWriter(budget_store)
+    atexit.register(budget_writer.flush)
+    return budget_store, budget_writer
+
+
+budget_store, budget_writer = get_budget_store()
+
+
+def load_saved_budget():
+    record = budget_store.load(st.session_state.budget_owner, st.session_state.saved_budget_choice)
+    if record is not None:
+        state.apply(st.session_state, record)
+        reset_line_editors()
+        st.session_state.budget_name = st.session_state.saved_budget_choice
+        st.session_state.last_saved_record = record
+
+
+def save_current_budget():
+    record = state.collect(st.session_state)
+    budget_store.save(st.session_state.budget_owner, st.session_state.budget_name, record)
+    st.session_state.last_saved_record = record
+
+
+# Grid columns per list, named after the line fields. Amount columns must be
+# filled in; the goal's Months is derived.
+LINE_COLUMNS = {
+    "additional_income": {
+        "Source": st.column_config.TextColumn("Source", required=True),
+        "Amount": st.column_config.NumberColumn("Amount", min_value=0.0, format="dollar", required=True),
+    },
+    "additional_expenses": {
+        "Expense": st.column_config.TextColumn("Expense", required=True),
+        "Amount": st.column_config.NumberColumn("Amount", min_value=0.0, format="dollar", required=True),
+    },
+    "savings_goals": {
+        "Goal": st.column_config.TextColumn("Goal", required=True),
+        "Target": st.column_config.NumberColumn("Target", min_value=0.0, format="dollar", required=True),
+        "Monthly": st.column_config.NumberColumn("Monthly", min_value=0.0, format="dollar", required=True),
+        "Deadline": st.column_config.NumberColumn("Deadline (months)", min_value=0, step=1),
+        "Priority": st.column_config.NumberColumn("Priority", min_value=1, step=1),
+        "Months": st.column_config.NumberColumn("Months to goal", format="%.1f", disabled=True),
+    },
+}
+LINE_TEXT_FIELDS = {"Source", "Expense", "Goal"}
+LINE_AMOUNT_FIELDS = {"Amount", "Target", "Monthly"}
+
+
+def line_editor_key(list_key):
+    return f"{list_key}_editor_{st.session_state.get('line_editor_version', 0)}"
+
+
+def apply_line_edits(list_key, lines):
+    """Apply one grid interaction's edits, additions and deletions together.
+
+    ``lines`` are the line dicts the grid was drawn from; the grid reports
+    rows by position in that drawing, so they are matched to those objects
+    rather than to positions in the current list.
+    """
+    changes = st.session_state[line_editor_key(list_key)]
+    for position, edits in changes["edited_rows"].items():
+        lines[int(position)].update(edits)
+    deleted = {id(lines[int(position)]) for position in changes["deleted_rows"]}
+    kept = [line for line in st.session_state[list_key] if id(line) not in deleted]
+    name_field = next(iter(LINE_COLUMNS[list_key]))
+    kept += [dict(row) for row in changes["added_rows"] if row.get(name_field)]
+    for line in kept:
+        for field in LINE_AMOUNT_FIELDS.intersection(LINE_COLUMNS[list_key]):
+            line[field] = float(line.get(field) or 0.0)
+        if list_key == "savings_goals":
+            line["Months"] = state.goal_months(line["Target"], line["Monthly"])
+    st.session_state[list_key] = kept
+    reset_line_editors()
+
+
+def line_editor(list_key):
+    """One virtualized grid for a whole list; add, edit or delete rows in place."""
+    lines = list(st.session_state[list_key])
+    columns = LINE_COLUMNS[list_key]
+    st.data_editor(
+        pd.DataFrame({
+            field: pd.Series(
+                [line.get(field) for line in lines],
+                dtype=object if field in LINE_TEXT_FIELDS else float
+            )
+            for field in columns
+        }),
+        hide_index=True,
+        num_rows="dynamic",
+        column_config=columns,
+        key=line_editor_key(list_key),
+        on_change=apply_line_edits,
+        args=(list_key, lines)
+    )
 
-with tab_income:
+
+def delete_saved_budget():
+    owner, name = st.session_state.budget_owner, st.session_state.saved_budget_choice
+    # A queued autosave would otherwise recreate the budget.
+    budget_writer.cancel(owner, name)
+    budget_store.delete(owner, name)
+
+
+def open_snapshot():
+    upload = st.session_state.snapshot_upload
+    if upload is None:
+        return
+    try:
+        record = snapshot.loads(upload.getvalue())
+    except ValueError as e:
+        st.session_state.snapshot_error = f"Could not open {upload.name}: {e}"
+        return
+    state.apply(st.session_state, record)
+    reset_line_editors()
+
+
+def share_current_budget():
+    token = snapshot.to_token(state.collect(st.session_state))
+    if len(token) > snapshot.MAX_TOKEN_LENGTH:
+        st.session_state.snapshot_error = "This budget is too large for a link; download a snapshot instead."
+        st.query_params.pop(SHARE_PARAM, None)
+        return
+    st.query_params[SHARE_PARAM] = token
+    st.session_state.restored_share_token = token
+
+
+def open_roster():
+    upload = st.session_state.roster_upload
+    if upload is None:
+        return
+    try:
+        st.session_state.cohort = roster.load_cohort(upload.getvalue(), upload.name)
+    except ValueError as e:
+        st.session_state.roster_error = f"Could not load {upload.name}: {e}"
+
+
+def open_employee(cohort, position):
+    """Show one roster row on the personal budget page."""
+    record = roster.employee_record(cohort, position)
+    state.apply(st.session_state, record)
+    reset_line_editors()
+    st.session_state.budget_name = record["name"]
+    st.session_state.app_mode = "Personal"
+    st.session_state.active_tab = "Income"
+
+
+APP_MODES = ("Personal", "Organization")
+
+st.session_state.setdefault("budget_owner", "default")
+st.session_state.setdefault("budget_name", "My Budget")
+st.session_state.setdefault("app_mode", "Personal")
+
+with st.sidebar, tracing.span("sidebar"):
+    st.radio("Mode", APP_MODES, key="app_mode", horizontal=True)
+    st.markdown("### 💾 Saved Budgets")
+    st.text_input("Profile", key="budget_owner")
+    st.text_input("Budget name", key="budget_name")
+    st.toggle("Auto-save changes", key="budget_autosave")
+    st.button(
+        "Save Budget",
+        on_click=save_current_budget,
+        disabled=not st.session_state.budget_name
+    )
+    saved_budgets = budget_store.list_budgets(st.session_state.budget_owner)
+    if saved_budgets:
+        st.selectbox("Saved budgets", [name for name, _ in saved_budgets], key="saved_budget_choice")
+        load_col, delete_col = st.columns(2)
+        with load_col:
+            st.button("Load", on_click=load_saved_budget)
+        with delete_col:
+            st.button("Delete", on_click=delete_saved_budget)
+
+    st.markdown("### 📦 Snapshot")
+    st.download_button(
+        "Download Snapshot",
+        # Built on click: tab edits rerun only their fragment, not this sidebar.
+        lambda: snapshot.dumps(state.collect(st.session_state)),
+        file_name=f"{st.session_state.budget_name or 'budget'}.budget",
+        mime="application/octet-stream",
+        on_click="ignore"
+    )
+    st.file_uploader("Open snapshot", type=["budget"], key="snapshot_upload", on_change=open_snapshot)
+    st.button("Share Link", on_click=share_current_budget)
+    share_token = st.query_params.get(SHARE_PARAM)
+    if share_token and share_token == st.session_state.get("restored_share_token"):
+        st.caption("The address bar links to this budget as it was when shared; share again after changes.")
+    if "snapshot_error" in st.session_state:
+        st.error(st.session_state.pop("snapshot_error"))
+    st.toggle("Show stage timings", key="trace_stages")
+
+
+def budget_model():
+    """The session's budget graph, brought up to date with the current inputs.
+
+    Tabs run as separate fragments, so each one reads its figures from this
+    shared graph instead of from locals; only quantities downstream of an
+    input that changed are recomputed.
+    """
+    with tracing.span("budget_model"):
+        inputs = st.session_state
+        values = state.graph_inputs({"inputs": inputs, **{key: inputs[key] for key in state.LIST_KEYS}})
+        if "budget_model" not in inputs:
+            inputs.budget_model = graph.budget_graph(values)
+        else:
+            inputs.budget_model.update(values)
+        return inputs.budget_model
+
+
+def autosave():
+    if st.session_state.budget_autosave and st.session_state.budget_name:
+        current_record = state.collect(st.session_state)
+        if current_record != st.session_state.get("last_saved_record"):
+            budget_writer.schedule(st.session_state.budget_owner, st.session_state.budget_name, current_record)
+            st.session_state.last_saved_record = current_record
+
+
+@st.fragment
+@traced
+def income_tab():
     st.subheader("💰 Monthly Income")
 
-    gross_income = st.number_input("Main job (gross)", value=5417.00, format="%.2f")
+    st.number_input("Main job (gross)", format="%.2f", key="gross_income")
+    st.selectbox("Pay frequency", tuple(payroll.PAY_FREQUENCIES), key="pay_frequency")
 
     st.markdown("#### 🧾 Payroll Withholdings & Contributions")
-    state_withholding_percent = st.number_input(
-        "State withholding / tax rate (%)",
+    st.number_input(
+        "State withholding (%)",
         min_value=0.0,
         max_value=20.0,
-        value=4.05,
-        format="%.2f"
+        format="%.2f",
+        key="state_withholding_percent"
     )
-    federal_withholding_percent = st.number_input(
+    st.number_input(
         "Federal withholding (%)",
         min_value=0.0,
         max_value=40.0,
-        value=12.0,
-        format="%.2f"
+        format="%.2f",
+        key="federal_withholding_percent"
     )
-    fsa_monthly = st.number_input("FSA monthly contribution", min_value=0.0, format="%.2f")
-    retirement_percent = st.number_input(
+    st.number_input("FSA monthly contribution", min_value=0.0, format="%.2f", key="fsa_monthly")
+    st.number_input(
         "Retirement contribution (%)",
         min_value=0.0,
         max_value=100.0,
-        format="%.2f"
+        format="%.2f",
+        key="retirement_percent"
     )
 
-    retirement_monthly = gross_income * (retirement_percent / 100.0)
-
-    state_withholding_rate = state_withholding_percent / 100.0
-    federal_withholding_rate = federal_withholding_percent / 100.0
-    taxable_income = max(0.0, gross_income - fsa_monthly - retirement_monthly)
-    state_withholding = taxable_income * state_withholding_rate
-    federal_withholding = taxable_income * federal_withholding_rate
-
-    ss_wage_base_annual = 168600.0
-    ss_wage_base_monthly = ss_wage_base_annual / 12.0
-    fica_taxable_income = max(0.0, gross_income - fsa_monthly)
-    social_security_tax = min(fica_taxable_income, ss_wage_base_monthly) * 0.062
-    medicare_tax = fica_taxable_income * 0.0145
-
-    total_payroll_taxes = (
-        social_security_tax + medicare_tax + state_withholding + federal_withholding
-    )
-    total_payroll_deductions = total_payroll_taxes + fsa_monthly + retirement_monthly
-    net_main_income = gross_income - total_payroll_deductions
+    model = budget_model()
+    state_withholding = model["state_withholding"]
+    federal_withholding = model["federal_withholding"]
+    social_security_tax = model["social_security_tax"]
+    medicare_tax = model["medicare_tax"]
+    total_payroll_taxes = model["total_payroll_taxes"]
+    net_main_income = model["net_main_income"]
 
     st.markdown(
         "**Estimated payroll withholdings (simplified):** "
@@ -187,12 +441,38 @@ with tab_income:
         "FSA and retirement reduce the taxable base used for withholding."
     )
 
-    va_income = st.number_input("VA Benefits", value=4158.17, format="%.2f")
+    with st.expander("🗓️ Paycheck Schedule"):
+        schedule = model["paycheck_schedule"]
+        capped = schedule["social_security_tax"] < schedule["fica_wages"] * engine.SOCIAL_SECURITY_RATE - 0.005
+        if capped.any():
+            crossing = schedule.loc[capped.idxmax()]
+            st.caption(
+                f"Year-to-date wages reach the ${engine.SS_WAGE_BASE_ANNUAL:,.0f} Social Security wage base "
+                f"on paycheck {crossing['paycheck']} ({crossing['pay_date']:%b %d}); Social Security stops "
+                "after that, so later checks are larger. The monthly figure above is the yearly average."
+            )
+        st.dataframe(
+            schedule[[
+                "paycheck", "pay_date", "gross_pay", "federal_withholding", "state_withholding",
+                "social_security_tax", "medicare_tax", "net_pay", "year_to_date_fica_wages"
+            ]],
+            hide_index=True,
+            column_config={
+                "paycheck": "Paycheck",
+                "pay_date": st.column_config.DateColumn("Pay date", format="MMM D"),
+                "gross_pay": st.column_config.NumberColumn("Gross", format="$%.2f"),
+                "federal_withholding": st.column_config.NumberColumn("Federal", format="$%.2f"),
+                "state_withholding": st.column_config.NumberColumn("State", format="$%.2f"),
+                "social_security_tax": st.column_config.NumberColumn("Social Security", format="$%.2f"),
+                "medicare_tax": st.column_config.NumberColumn("Medicare", format="$%.2f"),
+                "net_pay": st.column_config.NumberColumn("Net pay", format="$%.2f"),
+                "year_to_date_fica_wages": st.column_config.NumberColumn("YTD FICA wages", format="$%.2f")
+            }
+        )
+
+    st.number_input("VA Benefits", format="%.2f", key="va_income")
 
     st.markdown("#### ➕ Add Additional Income Sources")
-    if "additional_income" not in st.session_state:
-        st.session_state.additional_income = []
-
     with st.form("add_income_form"):
         add_income_name = st.text_input("Income Source Name")
         add_income_amount = st.number_input("Amount", min_value=0.0, format="%.2f", key="income_amount")
@@ -202,42 +482,86 @@ with tab_income:
                 "Source": add_income_name,
                 "Amount": add_income_amount
             })
-            st.rerun()
 
     if st.session_state.additional_income:
-        for i, income_item in enumerate(st.session_state.additional_income):
-            col1, col2, col3 = st.columns([3, 2, 1])
-            with col1:
-                st.markdown(f"**{income_item['Source']}**")
-            with col2:
-                st.markdown(f"${income_item['Amount']:,.2f}")
-            with col3:
-                if st.button("🗑️", key=f"delete_income_{i}"):
-                    st.session_state.additional_income.pop(i)
-                    st.rerun()
-        total_additional_income = sum(item["Amount"] for item in st.session_state.additional_income)
-    else:
-        total_additional_income = 0
+        line_editor("additional_income")
+
+    st.markdown("#### Summary")
+    st.metric("Total Income", f"${budget_model()['total_income']:,.2f}")
+    st.metric("Net Main Job Income", f"${net_main_income:,.2f}")
+
+    autosave()
+
 
-with tab_expenses:
+@st.fragment
+@traced
+def expenses_tab():
     st.subheader("💰 Monthly Expenses")
-    home = st.number_input("House Payment", value=1469.61, format="%.2f")
-    car_payment = st.number_input("Car Payment", value=472.84, format="%.2f")
-    car_insurance = st.number_input("Car Insurance", value=120.00, format="%.2f")
-    phone_bill = st.number_input("Phone Bill", value=140.00, format="%.2f")
-    internet = st.number_input("Internet Bill", value=50.00, format="%.2f")
-    electricity = st.number_input("Electricity Bill", value=180.00, format="%.2f")
-    water = st.number_input("Water Bill", value=50.00, format="%.2f")
-    spotify = st.number_input("Spotify Subscription", value=18.18, format="%.2f")
-    adobe = st.number_input("Adobe Subscription", value=21.39, format="%.2f")
-    digital_ocean = st.number_input("Digital Ocean Subscription", value=8.00, format="%.2f")
-    health = st.number_input("Health Insurance", value=100.00, format="%.2f")
-    dental = st.number_input("Dental Insurance", value=49.81, format="%.2f")
-    vision = st.number_input("Vision Insurance", value=15.43, format="%.2f")
+    for group, keys in categories.GROUPS.items():
+        st.markdown(f"##### {group}")
+        for key in keys:
+            st.number_input(categories.LABELS[key], format="%.2f", key=key)
+
+    def apply_statement_import():
+        imported = st.session_state.statement_import.categories
+        for category, line, average in zip(
+            imported["Category"], imported["Line"], imported["Monthly Average"]
+        ):
+            amount = round(float(average), 2)
+            if isinstance(line, str):
+                st.session_state[line] = amount
+            else:
+                st.session_state.additional_expenses.append({
+                    "Expense": category,
+                    "Amount": amount
+                })
+        del st.session_state.statement_import
+
+    with st.expander("📥 Import Bank or Card Statements"):
+        st.caption(
+            "Upload CSV, OFX or QFX exports. Spending is averaged per month over the "
+            "statement period and matched to the expense lines above where possible."
+        )
+        statement_files = st.file_uploader(
+            "Statement files",
+            type=["csv", "ofx", "qfx"],
+            accept_multiple_files=True
+        )
+        outflows_negative = st.radio(
+            "In CSV amount columns, spending is",
+            ["Negative (typical bank export)", "Positive (typical card export)"],
+            horizontal=True
+        ).startswith("Negative")
+        if st.button("Import Statements", disabled=not statement_files):
+            try:
+                st.session_state.statement_import = statements.import_statements(
+                    [(uploaded, uploaded.name) for uploaded in statement_files],
+                    outflows_negative=outflows_negative
+                )
+            except ValueError as e:
+                st.error(f"Could not import statements: {e}")
+
+        if "statement_import" in st.session_state:
+            statement_import = st.session_state.statement_import
+            st.caption(
+                f"Parsed {statement_import.rows:,} rows ({statement_import.bytes / 1_000_000:,.1f} MB) "
+                f"in {statement_import.seconds:.2f}s: {statement_import.rows_per_second:,.0f} rows/s, "
+                f"{statement_import.megabytes_per_second:,.1f} MB/s over {statement_import.months} months."
+            )
+            preview = statement_import.categories.assign(
+                Line=statement_import.categories["Line"].map(categories.LABELS).fillna("Additional expense")
+            )
+            st.dataframe(
+                preview[["Category", "Line", "Monthly Average"]],
+                hide_index=True,
+                column_config={
+                    "Line": "Expense line",
+                    "Monthly Average": st.column_config.NumberColumn(format="$%.2f")
+                }
+            )
+            st.button("Apply to Expenses", on_click=apply_statement_import)
 
     st.markdown("#### ➕ Add Additional Fixed Expenses")
-    if "additional_expenses" not in st.session_state:
-        st.session_state.additional_expenses = []
 
     with st.form("add_expense_form"):
         add_expense_name = st.text_input("Expense Name")
@@ -248,121 +572,197 @@ with tab_expenses:
                 "Expense": add_expense_name,
                 "Amount": add_expense_amount
             })
-            st.rerun()
 
     if st.session_state.additional_expenses:
-        for i, expense in enumerate(st.session_state.additional_expenses):
-            col1, col2, col3 = st.columns([3, 2, 1])
-            with col1:
-                st.markdown(f"**{expense['Expense']}**")
-            with col2:
-                st.markdown(f"${expense['Amount']:,.2f}")
-            with col3:
-                if st.button("🗑️", key=f"delete_expense_{i}"):
-                    st.session_state.additional_expenses.pop(i)
-                    st.rerun()
-        total_additional_expenses = sum(item["Amount"] for item in st.session_state.additional_expenses)
-    else:
-        total_additional_expenses = 0
-
-total_income = gross_income + va_income + total_additional_income
-total_expenses = (
-    home
-    + car_payment
-    + car_insurance
-    + phone_bill
-    + internet
-    + electricity
-    + water
-    + spotify
-    + adobe
-    + digital_ocean
-    + health
-    + dental
-    + vision
-    + total_payroll_taxes
-    + fsa_monthly
-    + retirement_monthly
-    + total_additional_expenses
-)
-surplus = total_income - total_expenses
+        line_editor("additional_expenses")
 
-with tab_income:
     st.markdown("#### Summary")
-    st.metric("Total Income", f"${total_income:,.2f}")
-    st.metric("Net Main Job Income", f"${net_main_income:,.2f}")
+    st.metric("Total Expenses", f"${budget_model()['total_expenses']:,.2f}")
 
-with tab_expenses:
-    st.markdown("#### Summary")
-    st.metric("Total Expenses", f"${total_expenses:,.2f}")
+    autosave()
 
-with tab_savings:
-    st.subheader("🎯 Savings Goals")
-    st.markdown("#### ➕ Create Savings Goals")
 
-    total_savings_allocation = 0
-    remaining_surplus = surplus
+def apply_allocation(monthly):
+    if len(monthly) != len(st.session_state.savings_goals):
+        return
+    for goal, amount in zip(st.session_state.savings_goals, monthly):
+        goal["Monthly"] = amount
+        goal["Months"] = state.goal_months(goal["Target"], amount)
+    reset_line_editors()
+
 
-    if "savings_goals" not in st.session_state:
-        st.session_state.savings_goals = []
+@st.fragment
+@traced
+def savings_tab():
+    st.subheader("🎯 Savings Goals")
+    st.markdown("#### ➕ Create Savings Goals")
 
     with st.form("add_savings_goal_form"):
-        goal_name = st.text_input("Goal Name (e.g., Emergency Fund, Vacation)")
+        goal_name = st.text_input("Goal Name (e.g., Emergency Fund, Vacation)", key="goal_name")
         goal_target = st.number_input("Target Amount ($)", min_value=0.0, format="%.2f", key="goal_target")
         goal_monthly = st.number_input("Monthly Contribution ($)", min_value=0.0, format="%.2f", key="goal_monthly")
         add_goal_submit = st.form_submit_button("Add Savings Goal")
         if add_goal_submit and goal_name and goal_target > 0 and goal_monthly > 0:
-            months_to_goal = goal_target / goal_monthly if goal_monthly > 0 else 0
             st.session_state.savings_goals.append({
                 "Goal": goal_name,
                 "Target": goal_target,
                 "Monthly": goal_monthly,
-                "Months": months_to_goal
+                "Months": state.goal_months(goal_target, goal_monthly)
             })
-            st.rerun()
 
     if st.session_state.savings_goals:
         st.markdown("#### 📊 Your Savings Goals")
 
-        for i, goal in enumerate(st.session_state.savings_goals):
-            col1, col2, col3, col4, col5 = st.columns([2, 2, 2, 2, 1])
-            with col1:
-                st.markdown(f"**{goal['Goal']}**")
-            with col2:
-                st.markdown(f"Target: ${goal['Target']:,.2f}")
-            with col3:
-                new_monthly = st.number_input(
-                    "Monthly",
-                    min_value=0.0,
-                    value=float(goal['Monthly']),
-                    format="%.2f",
-                    key=f"modify_goal_{i}"
+        line_editor("savings_goals")
+
+        with st.expander("🧮 Fit Contributions to Your Surplus"):
+            st.caption(
+                "Goals with a deadline (set in the table above) get what they need to meet it, in "
+                "priority order (1 first), until the monthly surplus runs out. The rest is shared by "
+                "goals without a deadline so they finish together; no goal gets more than its target a month."
+            )
+            goals = st.session_state.savings_goals
+            with tracing.span("allocation"):
+                fitted = allocation.allocate(
+                    budget_model()["surplus"],
+                    [goal["Target"] for goal in goals],
+                    [goal.get("Deadline") for goal in goals],
+                    [goal.get("Priority") or allocation.DEFAULT_PRIORITY for goal in goals]
                 )
-                if new_monthly != goal['Monthly']:
-                    st.session_state.savings_goals[i]['Monthly'] = new_monthly
-                    st.session_state.savings_goals[i]['Months'] = (
-                        goal['Target'] / new_monthly if new_monthly > 0 else 0
+            st.dataframe(
+                fitted.table([goal["Goal"] for goal in goals]).assign(
+                    Current=[goal["Monthly"] for goal in goals]
+                ),
+                hide_index=True,
+                column_config={
+                    "Monthly": st.column_config.NumberColumn("Proposed", format="dollar"),
+                    "Current": st.column_config.NumberColumn(format="dollar"),
+                    "Months": st.column_config.NumberColumn(format="%.1f")
+                }
+            )
+            missed = int((~fitted.on_schedule).sum())
+            if missed:
+                st.warning(f"The surplus cannot meet {missed} deadline(s); those goals get what is left.")
+            if fitted.unallocated > 0:
+                st.caption(f"${float(fitted.unallocated):,.2f} a month stays unallocated.")
+            st.button(
+                "Apply Proposed Contributions",
+                on_click=apply_allocation,
+                args=(tuple(float(amount) for amount in fitted.monthly),)
+            )
+
+        with st.expander("🎲 Simulate Goal Timelines"):
+            st.caption(
+                "Projects each goal under random month-to-month swings in income and expenses. "
+                "Months where the surplus falls short scale every goal's contribution down."
+            )
+            with st.form("simulate_goals_form"):
+                sim_col1, sim_col2 = st.columns(2)
+                with sim_col1:
+                    income_volatility = st.number_input(
+                        "Monthly income variation (%)", min_value=0.0, max_value=100.0, value=5.0, format="%.1f"
+                    )
+                    expense_volatility = st.number_input(
+                        "Monthly expense variation (%)", min_value=0.0, max_value=100.0, value=10.0, format="%.1f"
+                    )
+                    simulated_paths = st.selectbox("Simulated paths", [1000, 10000, 100000], index=1)
+                with sim_col2:
+                    annual_return = st.number_input(
+                        "Expected annual return (%)", min_value=-50.0, max_value=50.0, value=0.0, format="%.1f"
                     )
-            with col4:
-                months = goal['Target'] / goal['Monthly'] if goal['Monthly'] > 0 else 0
-                years = months / 12
-                if years >= 1:
-                    st.markdown(f"⏱️ {years:.1f} years ({months:.1f} months)")
+                    return_volatility = st.number_input(
+                        "Annual return volatility (%)", min_value=0.0, max_value=100.0, value=0.0, format="%.1f"
+                    )
+                    horizon_years = st.number_input("Horizon (years)", min_value=1, max_value=50, value=30, step=1)
+                run_simulation = st.form_submit_button("Run Simulation")
+
+            simulated_goals = tuple(
+                (goal['Goal'], goal['Target'], goal['Monthly']) for goal in st.session_state.savings_goals
+            )
+            if run_simulation:
+                st.session_state.goal_simulation = (
+                    simulated_goals,
+                    simulation.simulate_goals(
+                        [goal['Goal'] for goal in st.session_state.savings_goals],
+                        [goal['Target'] for goal in st.session_state.savings_goals],
+                        [goal['Monthly'] for goal in st.session_state.savings_goals],
+                        budget_model()["total_income"],
+                        budget_model()["total_expenses"],
+                        income_volatility=income_volatility / 100.0,
+                        expense_volatility=expense_volatility / 100.0,
+                        annual_return=annual_return / 100.0,
+                        return_volatility=return_volatility / 100.0,
+                        paths=simulated_paths,
+                        months=int(horizon_years) * 12
+                    )
+                )
+
+            if "goal_simulation" in st.session_state:
+                simulation_goals, simulation_result = st.session_state.goal_simulation
+                if simulation_goals != simulated_goals:
+                    st.info("Your goals changed since the last run. Run the simulation again to update it.")
                 else:
-                    st.markdown(f"⏱️ {months:.1f} months")
-            with col5:
-                if st.button("🗑️", key=f"delete_goal_{i}"):
-                    st.session_state.savings_goals.pop(i)
-                    st.rerun()
+                    st.dataframe(
+                        simulation_result.completion_table(),
+                        hide_index=True,
+                        column_config={
+                            "Chance within horizon": st.column_config.ProgressColumn(
+                                "Chance within horizon", min_value=0.0, max_value=1.0, format="percent"
+                            ),
+                            "P10 months": st.column_config.NumberColumn(format="%.0f"),
+                            "P50 months": st.column_config.NumberColumn(format="%.0f"),
+                            "P90 months": st.column_config.NumberColumn(format="%.0f")
+                        }
+                    )
+                    fan_goal = st.selectbox(
+                        "Fan chart for goal",
+                        range(len(simulation_result.goal_names)),
+                        format_func=lambda index: simulation_result.goal_names[index]
+                    )
+                    from budget import altair_charts
 
-        total_savings_allocation = sum(goal['Monthly'] for goal in st.session_state.savings_goals)
-        remaining_surplus = surplus - total_savings_allocation
+                    st.altair_chart(
+                        altair_charts.goal_fan_chart(simulation_result.fan(fan_goal)),
+                        width="stretch"
+                    )
+                    st.caption("Shaded band spans P10-P90 of simulated balances; the line is the median.")
 
+    model = budget_model()
     st.markdown("#### Summary")
-    st.metric("Total Monthly Savings", f"${total_savings_allocation:,.2f}")
-    st.metric("Remaining Surplus", f"${remaining_surplus:,.2f}")
+    st.metric("Total Monthly Savings", f"${model['savings_monthly']:,.2f}")
+    st.metric("Remaining Surplus", f"${model['remaining_surplus']:,.2f}")
+
+    autosave()
+
+
+JOB_POLL_SECONDS = 0.5
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def job_progress(key, label):
+    """Poll a pending report job, then rerun the page to pick up its result."""
+    job = jobs.pool.get(key)
+    if job is None or job.done:
+        st.rerun()
+    st.progress(job.progress, text=f"{label} ({job.status})...")
+
+
+@st.fragment
+@traced
+def report_tab():
+    # Altair loads on first use so the default tab paints without it.
+    from budget import altair_charts
+
+    model = budget_model()
+    gross_income = model["gross_income"]
+    fsa_monthly = model["fsa_monthly"]
+    retirement_percent = model["retirement_percent"]
+    state_withholding_percent = model["state_withholding_percent"]
+    federal_withholding_percent = model["federal_withholding_percent"]
+    total_income = model["total_income"]
+    total_expenses = model["total_expenses"]
+    surplus = model["surplus"]
 
-with tab_report:
     st.markdown(f"**💵 Total Income:** ${total_income:,.2f}")
     st.markdown(f"**🧾 Total Expenses:** ${total_expenses:,.2f}")
     st.markdown(f"**📈 Monthly Surplus:** ${surplus:,.2f}")
@@ -371,77 +771,32 @@ with tab_report:
 
     filing_status = st.selectbox(
         "Filing status",
-        ["Single", "Married filing jointly", "Married filing separately"],
-        index=1
+        engine.FILING_STATUSES,
+        key="filing_status"
     )
-
-    def compute_federal_tax_2024(taxable_income, brackets):
-        remaining = taxable_income
-        lower_limit = 0.0
-        tax = 0.0
-        for upper_limit, rate in brackets:
-            if remaining <= 0:
-                break
-            taxable_at_rate = min(remaining, upper_limit - lower_limit)
-            tax += taxable_at_rate * rate
-            remaining -= taxable_at_rate
-            lower_limit = upper_limit
-        return tax
-
-    federal_brackets_by_status = {
-        "Single": [
-            (11600, 0.10),
-            (47150, 0.12),
-            (100525, 0.22),
-            (191950, 0.24),
-            (243725, 0.32),
-            (609350, 0.35),
-            (float("inf"), 0.37)
-        ],
-        "Married filing jointly": [
-            (23200, 0.10),
-            (94300, 0.12),
-            (201050, 0.22),
-            (383900, 0.24),
-            (487450, 0.32),
-            (731200, 0.35),
-            (float("inf"), 0.37)
-        ],
-        "Married filing separately": [
-            (11600, 0.10),
-            (47150, 0.12),
-            (100525, 0.22),
-            (191950, 0.24),
-            (243725, 0.32),
-            (365600, 0.35),
-            (float("inf"), 0.37)
-        ]
-    }
-    standard_deduction_by_status = {
-        "Single": 14600.0,
-        "Married filing jointly": 29200.0,
-        "Married filing separately": 14600.0
-    }
-
-    standard_deduction = standard_deduction_by_status[filing_status]
-    annual_taxable_base = taxable_income * 12.0
-    annual_taxable_income = max(0.0, annual_taxable_base - standard_deduction)
-    annual_federal_tax = compute_federal_tax_2024(
-        annual_taxable_income,
-        federal_brackets_by_status[filing_status]
+    state_names = tax.state_table(model["tax_year"]).names
+    residence_state = st.selectbox(
+        "State of residence",
+        tuple(state_names),
+        format_func=state_names.get,
+        key="residence_state"
     )
-    annual_state_tax = taxable_income * 12.0 * state_withholding_rate
-
-    annual_federal_withholding = federal_withholding * 12.0
-    annual_state_withholding = state_withholding * 12.0
-
-    annual_total_withholding = annual_federal_withholding + annual_state_withholding
-    annual_total_tax = annual_federal_tax + annual_state_tax
-    estimated_refund = annual_total_withholding - annual_total_tax
-    error_percent = 10.0
-    error_percent_amount = abs(estimated_refund) * (error_percent / 100.0)
-    refund_low_pct = estimated_refund - error_percent_amount
-    refund_high_pct = estimated_refund + error_percent_amount
+
+    annual_tax = model.values(engine.ANNUAL_TAX_FIELDS)
+    standard_deduction = annual_tax["standard_deduction"]
+    annual_taxable_base = annual_tax["annual_taxable_base"]
+    annual_taxable_income = annual_tax["annual_taxable_income"]
+    annual_federal_tax = annual_tax["annual_federal_tax"]
+    state_deduction = annual_tax["state_deduction"]
+    annual_state_tax = annual_tax["annual_state_tax"]
+    annual_federal_withholding = annual_tax["annual_federal_withholding"]
+    annual_state_withholding = annual_tax["annual_state_withholding"]
+    annual_total_withholding = annual_tax["annual_total_withholding"]
+    annual_total_tax = annual_tax["annual_total_tax"]
+    estimated_refund = annual_tax["estimated_refund"]
+    error_percent = engine.REFUND_ERROR_PERCENT
+    refund_low_pct = annual_tax["refund_low_pct"]
+    refund_high_pct = annual_tax["refund_high_pct"]
     refund_label = "Estimated refund" if estimated_refund >= 0 else "Estimated amount owed"
     refund_display = f"${abs(estimated_refund):,.2f}"
     refund_explainer = (
@@ -461,7 +816,8 @@ with tab_report:
     st.markdown(f"Federal tax liability (est.): ${annual_federal_tax:,.2f}")
     st.markdown(f"State tax liability (est.): ${annual_state_tax:,.2f}")
     st.markdown(
-        "State liability uses the flat state rate applied to the annual taxable base."
+        f"State liability uses {state_names[residence_state]}'s {model['tax_year']} brackets on the "
+        f"annual taxable base less ${state_deduction:,.2f} in state deductions and exemptions."
     )
     st.markdown(
         "<div class='tax-equation'>Total tax liability = federal tax + state tax</div>",
@@ -506,384 +862,290 @@ with tab_report:
     st.caption(refund_explainer)
     st.caption(
         "Federal tax uses 2024 brackets with the standard deduction. "
-        "State tax uses the same rate as state withholding. Withholdings use your flat % inputs."
+        "State tax uses your state's brackets, deductions and credits. Withholdings use your flat % inputs."
     )
 
+    with tracing.span("break_even"):
+        break_even = withholding.solve_zero_refund(
+            gross_income,
+            fsa_monthly,
+            retirement_percent,
+            state_withholding_percent,
+            filing_status,
+            residence_state
+        )
+    st.markdown("##### Break-even Federal Withholding")
+    st.markdown(
+        f"A federal withholding rate of **{break_even.rate_percent:.2f}%** brings the "
+        f"estimated refund to ${break_even.refund:,.2f} "
+        f"(currently {federal_withholding_percent:.2f}%)."
+    )
+    st.line_chart(
+        pd.DataFrame({
+            "Federal withholding (%)": break_even.rates_percent,
+            "Estimated refund ($)": break_even.refunds
+        }),
+        x="Federal withholding (%)",
+        y="Estimated refund ($)"
+    )
 
 
-    total_savings_allocation = 0
-    if "savings_goals" in st.session_state and st.session_state.savings_goals:
-        total_savings_allocation = sum(goal['Monthly'] for goal in st.session_state.savings_goals)
-
-    remaining_after_savings = surplus - total_savings_allocation
 
     col1, col2 = st.columns(2)
-    fig1, ax1 = plt.subplots(figsize=(9, 7))
-    colors1 = ['#0078D4', '#a64957', '#7cb342', '#fdd835']
-    labels1 = ['Total Income', 'Total Expenses', 'Savings Allocation', 'Remaining']
-    values1 = [total_income, total_expenses, total_savings_allocation, max(0, remaining_after_savings)]
-    explode1 = (0.05, 0.05, 0.05, 0.05)
-    wedges, texts, autotexts = ax1.pie(
-        values1,
-        labels=labels1,
-        colors=colors1,
-        autopct=lambda pct: f'${pct * sum(values1) / 100:,.0f}\n({pct:.1f}%)',
-        startangle=90,
-        explode=explode1,
-        shadow=True,
-        textprops={'fontsize': 10, 'weight': 'bold'}
-    )
-    ax1.set_title("Budget Distribution", fontsize=16, fontweight='bold', pad=20)
-    for autotext in autotexts:
-        autotext.set_color('white')
-        autotext.set_fontweight('bold')
+    values1 = export.budget_distribution(model.values())
 
     with col1:
         st.markdown("##### Income vs Expenses vs Savings")
-        st.pyplot(fig1)
-
-    expense_categories = []
-    expense_amounts = []
-
-    if home > 0:
-        expense_categories.append("House Payment")
-        expense_amounts.append(home)
-    if car_payment > 0:
-        expense_categories.append("Car Payment")
-        expense_amounts.append(car_payment)
-    if car_insurance > 0:
-        expense_categories.append("Car Insurance")
-        expense_amounts.append(car_insurance)
-    if phone_bill > 0:
-        expense_categories.append("Phone Bill")
-        expense_amounts.append(phone_bill)
-    if internet > 0:
-        expense_categories.append("Internet")
-        expense_amounts.append(internet)
-    if electricity > 0:
-        expense_categories.append("Electricity")
-        expense_amounts.append(electricity)
-    if water > 0:
-        expense_categories.append("Water")
-        expense_amounts.append(water)
-    if spotify > 0:
-        expense_categories.append("Spotify Subscription")
-        expense_amounts.append(spotify)
-    if adobe > 0:
-        expense_categories.append("Adobe Subscription")
-        expense_amounts.append(adobe)
-    if digital_ocean > 0:
-        expense_categories.append("Digital Ocean Subscription")
-        expense_amounts.append(digital_ocean)
-    if health > 0:
-        expense_categories.append("Health Insurance")
-        expense_amounts.append(health)
-    if dental > 0:
-        expense_categories.append("Dental Insurance")
-        expense_amounts.append(dental)
-    if vision > 0:
-        expense_categories.append("Vision Insurance")
-        expense_amounts.append(vision)
-    if total_payroll_taxes > 0:
-        expense_categories.append("Payroll Withholdings (Est.)")
-        expense_amounts.append(total_payroll_taxes)
-    if fsa_monthly > 0:
-        expense_categories.append("FSA Contribution")
-        expense_amounts.append(fsa_monthly)
-    if retirement_monthly > 0:
-        expense_categories.append("Retirement Contribution")
-        expense_amounts.append(retirement_monthly)
-
-    for item in st.session_state.additional_expenses:
-        expense_categories.append(item['Expense'])
-        expense_amounts.append(item['Amount'])
-
-    expense_data = list(zip(expense_categories, expense_amounts))
-    expense_data.sort(key=lambda x: x[1], reverse=True)
-
-    if len(expense_data) > 5:
-        top_5 = expense_data[:5]
-        other_amount = sum(amt for _, amt in expense_data[5:])
-        final_categories = [cat for cat, _ in top_5] + ['Other Expenses']
-        final_amounts = [amt for _, amt in top_5] + [other_amount]
-    else:
-        final_categories = [cat for cat, _ in expense_data]
-        final_amounts = [amt for _, amt in expense_data]
-
-    fig2, ax2 = plt.subplots(figsize=(9, 7))
-    colors2 = ['#0078D4', '#50E6FF', '#7cb342', '#fdd835', '#f06292', '#b0b0b0']
-    explode2 = [0.05] * len(final_amounts)
-
-    wedges2, texts2, autotexts2 = ax2.pie(
-        final_amounts,
-        labels=final_categories,
-        colors=colors2[:len(final_categories)],
-        autopct=lambda pct: f'${pct * sum(final_amounts) / 100:,.0f}\n({pct:.1f}%)',
-        startangle=90,
-        explode=explode2,
-        shadow=True,
-        textprops={'fontsize': 10, 'weight': 'bold'}
-    )
-    ax2.set_title("Where Your Money Goes (Top 5)", fontsize=16, fontweight='bold', pad=20)
+        with tracing.span("charts"):
+            st.altair_chart(altair_charts.budget_distribution_chart(values1), width="stretch")
 
-    for autotext in autotexts2:
-        autotext.set_color('white')
-        autotext.set_fontweight('bold')
+    final_categories, final_amounts = export.expense_breakdown(model.values(), st.session_state.additional_expenses)
 
     with col2:
         st.markdown("##### Expense Breakdown")
-        st.pyplot(fig2)
+        with tracing.span("charts"):
+            st.altair_chart(
+                altair_charts.expense_breakdown_chart(final_categories, final_amounts),
+                width="stretch"
+            )
 
-    fig3 = None
     if "savings_goals" in st.session_state and st.session_state.savings_goals:
         st.markdown("##### Savings Goals Progress")
-        fig3, ax3 = plt.subplots(figsize=(10, 6))
-
-        goal_names = [goal['Goal'] for goal in st.session_state.savings_goals]
-        goal_amounts = [goal['Monthly'] for goal in st.session_state.savings_goals]
-
-        colors3 = ['#0078D4', '#50E6FF', '#7cb342', '#fdd835', '#f06292']
-        bars = ax3.bar(goal_names, goal_amounts, color=colors3[:len(goal_names)], edgecolor='black', linewidth=1.5)
-        ax3.set_ylabel('Monthly Amount ($)', fontsize=13, fontweight='bold')
-        ax3.set_title('Monthly Savings Contributions', fontsize=16, fontweight='bold', pad=20)
-        ax3.tick_params(axis='x', rotation=45, labelsize=10)
-        ax3.grid(axis='y', alpha=0.3, linestyle='--')
-        ax3.set_axisbelow(True)
-
-        for bar, goal in zip(bars, st.session_state.savings_goals):
-            height = bar.get_height()
-            ax3.text(
-                bar.get_x() + bar.get_width() / 2.0,
-                height,
-                f'${height:,.2f}/mo\n{goal["Months"]:.1f} months',
-                ha='center',
-                va='bottom',
-                fontsize=10,
-                fontweight='bold'
+        with tracing.span("charts"):
+            st.altair_chart(
+                altair_charts.savings_goals_chart(
+                    [goal['Goal'] for goal in st.session_state.savings_goals],
+                    [goal['Monthly'] for goal in st.session_state.savings_goals],
+                    [goal['Months'] for goal in st.session_state.savings_goals]
+                ),
+                width="stretch"
             )
 
-        plt.tight_layout()
-        st.pyplot(fig3)
-
     st.subheader("⬇️ Download Your Budget Spreadsheet")
 
-    income_rows = [
-        {"Section": "Income", "Category": "Main Job (Gross)", "Amount": gross_income},
-        {"Section": "Income", "Category": "VA Benefits", "Amount": va_income}
-    ]
-    income_rows += [
-        {"Section": "Income", "Category": f"Additional Income: {item['Source']}", "Amount": item["Amount"]}
-        for item in st.session_state.additional_income
-    ]
-    income_rows.append({"Section": "Income", "Category": "Total Income", "Amount": total_income})
-
-    expense_rows = [
-        {"Section": "Expenses", "Category": "House Payment", "Amount": home},
-        {"Section": "Expenses", "Category": "Car Payment", "Amount": car_payment},
-        {"Section": "Expenses", "Category": "Car Insurance", "Amount": car_insurance},
-        {"Section": "Expenses", "Category": "Phone Bill", "Amount": phone_bill},
-        {"Section": "Expenses", "Category": "Internet Bill", "Amount": internet},
-        {"Section": "Expenses", "Category": "Electricity Bill", "Amount": electricity},
-        {"Section": "Expenses", "Category": "Water Bill", "Amount": water},
-        {"Section": "Expenses", "Category": "Spotify Subscription", "Amount": spotify},
-        {"Section": "Expenses", "Category": "Adobe Subscription", "Amount": adobe},
-        {"Section": "Expenses", "Category": "Digital Ocean Subscription", "Amount": digital_ocean},
-        {"Section": "Expenses", "Category": "Health Insurance", "Amount": health},
-        {"Section": "Expenses", "Category": "Dental Insurance", "Amount": dental},
-        {"Section": "Expenses", "Category": "Vision Insurance", "Amount": vision},
-        {"Section": "Expenses", "Category": "Payroll Withholdings (Est.)", "Amount": total_payroll_taxes},
-        {"Section": "Expenses", "Category": "FSA Contribution", "Amount": fsa_monthly},
-        {"Section": "Expenses", "Category": "Retirement Contribution", "Amount": retirement_monthly}
-    ]
-    expense_rows += [
-        {"Section": "Expenses", "Category": f"Additional Expense: {item['Expense']}", "Amount": item["Amount"]}
-        for item in st.session_state.additional_expenses
-    ]
-    expense_rows.append({"Section": "Expenses", "Category": "Total Expenses", "Amount": total_expenses})
-
-    summary_rows = [
-        {"Section": "Summary", "Category": "Net Main Job Income", "Amount": net_main_income},
-        {"Section": "Summary", "Category": "Monthly Surplus", "Amount": surplus}
-    ]
-
-    savings_rows = []
-    if "savings_goals" in st.session_state and st.session_state.savings_goals:
-        for goal in st.session_state.savings_goals:
-            savings_rows.append({
-                "Section": "Savings Goals",
-                "Category": f"{goal['Goal']} (Target: ${goal['Target']:,.2f}, Timeline: {goal['Months']:.1f} months)",
-                "Amount": goal['Monthly']
-            })
-        total_savings_allocation = sum(goal['Monthly'] for goal in st.session_state.savings_goals)
-        remaining_surplus = surplus - total_savings_allocation
-        savings_rows.append({
-            "Section": "Savings Goals",
-            "Category": "Total Savings Allocation",
-            "Amount": total_savings_allocation
-        })
-        savings_rows.append({
-            "Section": "Savings Goals",
-            "Category": "Remaining Surplus",
-            "Amount": remaining_surplus
-        })
-
-    export_rows = income_rows + expense_rows + summary_rows + savings_rows
-    export_df = pd.DataFrame(export_rows)
-
-    def highlight_section(row):
-        color = {
-            "Income": "#43c0d1",
-            "Expenses": "#a64957",
-            "Summary": "#a29936",
-            "Savings Goals": "#7cb342"
-        }.get(row.Section, "#ffffff")
-        return [f"background-color: {color}"] * len(row)
+    with tracing.span("export_frame"):
+        export_df = export.export_frame(
+            model.values(),
+            st.session_state.additional_income,
+            st.session_state.additional_expenses,
+            st.session_state.savings_goals
+        )
 
     st.markdown("##### Preview of Your Budget Spreadsheet")
-    st.dataframe(
-        export_df.style.apply(highlight_section, axis=1).format({"Amount": "${:,.2f}"}),
-        use_container_width=True
-    )
-
-    def to_excel(df, chart_fig1, chart_fig2, chart_fig3=None):
-        output = io.BytesIO()
-        workbook = xlsxwriter.Workbook(output, {'in_memory': True})
-        worksheet = workbook.add_worksheet("Budget")
-        charts_worksheet = workbook.add_worksheet("Visualizations")
-        tax_worksheet = workbook.add_worksheet("Estimated Tax Return")
-
-        formats = {
-            "Income": workbook.add_format({'bg_color': '#e0f7fa', 'num_format': '$#,##0.00'}),
-            "Expenses": workbook.add_format({'bg_color': '#ffebee', 'num_format': '$#,##0.00'}),
-            "Savings": workbook.add_format({'bg_color': '#e8f5e9', 'num_format': '$#,##0.00'}),
-            "Savings Goals": workbook.add_format({'bg_color': '#e8f5e9', 'num_format': '$#,##0.00'}),
-            "Summary": workbook.add_format({'bg_color': '#fffde7', 'num_format': '$#,##0.00'}),
-            "Header": workbook.add_format({'bold': True, 'bg_color': '#bdbdbd', 'border': 1}),
-            "Default": workbook.add_format({'num_format': '$#,##0.00'})
-        }
-        tax_formats = {
-            "Base": workbook.add_format({'bg_color': '#e3f2fd', 'num_format': '$#,##0.00'}),
-            "Deduction": workbook.add_format({'bg_color': '#fff8e1', 'num_format': '$#,##0.00'}),
-            "Taxable": workbook.add_format({'bg_color': '#e8f5e9', 'num_format': '$#,##0.00'}),
-            "Liability": workbook.add_format({'bg_color': '#ffebee', 'num_format': '$#,##0.00'}),
-            "Withholding": workbook.add_format({'bg_color': '#e8f5e9', 'num_format': '$#,##0.00'}),
-            "RefundPositive": workbook.add_format({'font_color': '#1b5e20', 'num_format': '$#,##0.00'}),
-            "RefundNegative": workbook.add_format({'font_color': '#b71c1c', 'num_format': '$#,##0.00'}),
-            "Note": workbook.add_format({'font_color': '#5f6368'})
-        }
+    preview_pages = export.preview_pages(export_df)
+    preview_page = 1
+    if preview_pages > 1:
+        st.session_state.preview_page = min(st.session_state.get("preview_page", 1), preview_pages)
+        preview_page = st.number_input(
+            f"Page (of {preview_pages}, {export.PREVIEW_PAGE_ROWS} rows each)",
+            min_value=1,
+            max_value=preview_pages,
+            step=1,
+            key="preview_page"
+        )
+    with tracing.span("preview"):
+        st.dataframe(
+            export.preview(export_df, preview_page),
+            hide_index=True,
+            width="stretch",
+            column_config={
+                "Section": st.column_config.MultiselectColumn(
+                    "Section",
+                    options=list(export.SECTION_COLORS),
+                    color=list(export.SECTION_COLORS.values())
+                ),
+                "Amount": st.column_config.NumberColumn(format="dollar")
+            }
+        )
 
-        for col_num, value in enumerate(df.columns):
-            worksheet.write(0, col_num, value, formats["Header"])
+    goal_snapshot = [dict(goal) for goal in st.session_state.get("savings_goals", [])]
+    workbook_tax = model.values(export.WORKBOOK_TAX_FIELDS)
+    # Identical budgets share one build, across sessions too.
+    workbook_key = (
+        "workbook",
+        export.export_digest(export_df, filing_status, workbook_tax, residence_state, model["tax_year"])
+    )
 
-        for row_num, row in enumerate(df.itertuples(index=False), 1):
-            section = getattr(row, "Section")
-            fmt = formats.get(section, formats["Default"])
-            worksheet.write(row_num, 0, row.Section)
-            worksheet.write(row_num, 1, row.Category)
-            worksheet.write_number(row_num, 2, row.Amount, fmt)
+    def build_workbook():
+        try:
+            jobs.pool.submit(
+                workbook_key,
+                "workbook",
+                export.budget_workbook,
+                export_df,
+                filing_status,
+                workbook_tax,
+                goal_snapshot,
+                model["tax_year"],
+                residence_state
+            )
+        except jobs.QueueFull:
+            st.session_state.workbook_error = "Too many reports are being built right now; try again shortly."
+
+    workbook_job = jobs.pool.get(workbook_key)
+    if workbook_job is None:
+        st.button("Build Excel Workbook", on_click=build_workbook)
+    elif not workbook_job.done:
+        job_progress(workbook_key, "Building the workbook")
+    elif workbook_job.error is not None:
+        st.error(f"Could not build the workbook: {workbook_job.error}")
+        st.button("Try Again", on_click=build_workbook)
+    else:
+        st.download_button(
+            label="Download Budget with Visualizations as Excel",
+            data=workbook_job.result,
+            file_name="budget_summary_with_charts.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            on_click="ignore"
+        )
+    if "workbook_error" in st.session_state:
+        st.warning(st.session_state.pop("workbook_error"))
 
-        worksheet.set_column(0, 0, 12)
-        worksheet.set_column(1, 1, 35)
-        worksheet.set_column(2, 2, 18)
+    autosave()
 
-        title_format = workbook.add_format({'bold': True, 'font_size': 14, 'color': '#0078D4'})
-        charts_worksheet.write('A1', 'Budget Visualizations', title_format)
 
-        tax_worksheet.write('A1', 'Estimated Tax Return (Annual)', title_format)
-        tax_worksheet.write('A3', 'Filing Status', formats["Header"])
-        tax_worksheet.write('B3', filing_status)
+@st.fragment
+@traced
+def organization_page():
+    from budget import altair_charts
 
-        tax_worksheet.write('A4', 'Notes', formats["Header"])
-        tax_worksheet.write(
-            'B4',
-            '2024 brackets + standard deduction; flat withholding rates',
-            tax_formats["Note"]
-        )
-        tax_worksheet.write('A5', 'Tax Liability', formats["Header"])
-        tax_worksheet.write(
-            'B5',
-            'Federal tax liability + state tax liability',
-            tax_formats["Note"]
+    if st.session_state.app_mode != "Organization":
+        # An employee was opened from this fragment; switch the whole page over.
+        st.rerun()
+    st.subheader("🏢 Organization")
+    st.caption(
+        "Upload an employee roster with one row per employee. Columns are named after the budget inputs "
+        "(gross_income, filing_status, residence_state, federal_withholding_percent, home, ...); only "
+        "gross_income is required, and amounts left out count as zero. An employee_id or name column "
+        "labels the rows."
+    )
+    st.file_uploader("Employee roster", type=["csv", "parquet"], key="roster_upload", on_change=open_roster)
+    if "roster_error" in st.session_state:
+        st.error(st.session_state.pop("roster_error"))
+    cohort = st.session_state.get("cohort")
+    if cohort is None:
+        return
+    st.caption(f"{len(cohort.frame):,} employees from {cohort.file_name}.")
+
+    state_names = tax.state_table().names
+    status_col, state_col = st.columns(2)
+    with status_col:
+        filing_statuses = st.multiselect(
+            "Filing status", engine.FILING_STATUSES, key="cohort_statuses", placeholder="All"
         )
-        tax_worksheet.write('A6', 'Refund Formula', formats["Header"])
-        tax_worksheet.write(
-            'B6',
-            'Total withholdings - total tax liability',
-            tax_formats["Note"]
+    with state_col:
+        states = st.multiselect(
+            "State", cohort.states, format_func=state_names.get, key="cohort_states", placeholder="All"
         )
-        tax_worksheet.write('A7', 'Error Range', formats["Header"])
-        tax_worksheet.write(
-            'B7',
-            'Shown as +/-10% of estimated refund/owed',
-            tax_formats["Note"]
+    figure = st.selectbox(
+        "Figure", list(roster.FIGURE_LABELS), format_func=roster.FIGURE_LABELS.get, key="cohort_figure"
+    )
+    with tracing.span("cohort_summary"):
+        summary = roster.summarize(cohort, figure, filing_statuses, states)
+
+    st.metric("Employees", f"{summary.employees:,}")
+    if not summary.employees:
+        st.info("No employees match these filters.")
+        return
+    with tracing.span("charts"):
+        st.altair_chart(
+            altair_charts.histogram_chart(summary.histogram, roster.FIGURE_LABELS[figure]),
+            width="stretch"
         )
+    dollars = st.column_config.NumberColumn(format="dollar")
+    st.markdown("##### Percentiles by Filing Status")
+    st.dataframe(
+        summary.percentiles,
+        hide_index=True,
+        column_config={f"P{level}": dollars for level in roster.PERCENTILES}
+    )
 
-        tax_rows = [
-            ("Annual Taxable Base (gross - FSA - retirement)", annual_taxable_base, "Base"),
-            ("Standard Deduction (2024)", standard_deduction, "Deduction"),
-            ("Annual Taxable Income", annual_taxable_income, "Taxable"),
-            ("Federal Tax Liability (Est.)", annual_federal_tax, "Liability"),
-            ("State Tax Liability (Est.)", annual_state_tax, "Liability"),
-            ("Federal Withholding (Annual)", annual_federal_withholding, "Withholding"),
-            ("State Withholding (Annual)", annual_state_withholding, "Withholding"),
-            ("Total Withholding (Annual)", annual_total_withholding, "Withholding"),
-            ("Estimated Refund / Amount Owed", estimated_refund, "Refund"),
-            ("Refund Range (±10%) Low", refund_low_pct, "RefundRange"),
-            ("Refund Range (±10%) High", refund_high_pct, "RefundRange")
-        ]
-
-        tax_worksheet.write('A9', 'Category', formats["Header"])
-        tax_worksheet.write('B9', 'Amount', formats["Header"])
-        for idx, (label, amount, category) in enumerate(tax_rows, start=10):
-            tax_worksheet.write(f'A{idx}', label)
-            if category in ("Refund", "RefundRange"):
-                refund_format = (
-                    tax_formats["RefundPositive"]
-                    if amount >= 0
-                    else tax_formats["RefundNegative"]
-                )
-                tax_worksheet.write_number(f'B{idx}', amount, refund_format)
-            else:
-                tax_worksheet.write_number(
-                    f'B{idx}',
-                    amount,
-                    tax_formats.get(category, formats["Default"])
-                )
-
-        tax_worksheet.set_column(0, 0, 40)
-        tax_worksheet.set_column(1, 1, 20)
-
-        try:
-            img1_buffer = io.BytesIO()
-            chart_fig1.savefig(img1_buffer, format='png', dpi=100, bbox_inches='tight')
-            img1_buffer.seek(0)
-            charts_worksheet.insert_image('A3', 'budget_distribution.png', {'image_data': img1_buffer})
-
-            img2_buffer = io.BytesIO()
-            chart_fig2.savefig(img2_buffer, format='png', dpi=100, bbox_inches='tight')
-            img2_buffer.seek(0)
-            charts_worksheet.insert_image('A38', 'expense_breakdown.png', {'image_data': img2_buffer})
-
-            if chart_fig3 is not None:
-                img3_buffer = io.BytesIO()
-                chart_fig3.savefig(img3_buffer, format='png', dpi=100, bbox_inches='tight')
-                img3_buffer.seek(0)
-                charts_worksheet.insert_image('A73', 'savings_goals.png', {'image_data': img3_buffer})
-        except Exception as e:
-            charts_worksheet.write('A3', f'Chart export error: {str(e)}')
-            charts_worksheet.write('A4', 'Charts are available in the web app view.')
-
-        charts_worksheet.set_column(0, 0, 100)
+    st.markdown(f"##### Lowest {roster.FIGURE_LABELS[figure]}")
+    lowest = st.dataframe(
+        summary.lowest,
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key="cohort_lowest",
+        column_config={
+            "employee": "Employee",
+            "filing_status": "Filing status",
+            "residence_state": "State",
+            "gross_income": st.column_config.NumberColumn("Gross income", format="dollar"),
+            **{
+                name: st.column_config.NumberColumn(label, format="dollar")
+                for name, label in roster.FIGURE_LABELS.items()
+            }
+        }
+    )
+    lookup = st.text_input("Or open an employee by ID or name", key="cohort_lookup")
+    if lookup:
+        position = cohort.find(lookup)
+        if position is None:
+            st.warning(f"No employee {lookup!r} in this roster.")
+    elif lowest.selection.rows:
+        position = int(summary.lowest.index[lowest.selection.rows[0]])
+    else:
+        position = None
+    if position is not None:
+        st.button(
+            f"Open {cohort.frame['employee'].iat[position]}'s Budget",
+            on_click=open_employee,
+            args=(cohort, position)
+        )
 
-        workbook.close()
-        output.seek(0)
-        return output
 
-    excel_data = to_excel(export_df, fig1, fig2, fig3)
+if st.session_state.app_mode == "Organization":
+    organization_page()
+else:
+    tab_income, tab_expenses, tab_savings, tab_report = st.tabs(
+        ["Income", "Expenses", "Savings Goals", "Visuals & Export"],
+        key="active_tab",
+        on_change="rerun"
+    )
 
-    st.download_button(
-        label="Download Budget with Visualizations as Excel",
-        data=excel_data,
-        file_name="budget_summary_with_charts.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
\ No newline at end of file
+    # Only the open tab runs, and each tab is a fragment: editing a widget
+    # reruns that tab alone rather than the whole page.
+    with tab_income:
+        if tab_income.open:
+            income_tab()
+    with tab_expenses:
+        if tab_expenses.open:
+            expenses_tab()
+    with tab_savings:
+        if tab_savings.open:
+            savings_tab()
+    with tab_report:
+        if tab_report.open:
+            report_tab()
+
+page_run = page_trace.stop()
+if st.session_state.trace_stages:
+    with st.sidebar:
+        st.markdown("#### Stage timings")
+        if page_run is not None:
+            st.caption(
+                f"Last full run: {page_run.stages['page'] * 1000:,.1f} ms. "
+                "Edits inside a tab rerun only that tab and are logged under the tab's name."
+            )
+            st.dataframe(
+                pd.DataFrame({
+                    "Stage": list(page_run.stages),
+                    "ms": [seconds * 1000 for seconds in page_run.stages.values()]
+                }),
+                hide_index=True
+            )
+        st.caption("All sessions, recent runs")
+        st.dataframe(tracing.recorder.summary(), hide_index=True)
+        job_stats = jobs.pool.stats()
+        st.caption(
+            f"Report jobs: {job_stats['queued']} queued, {job_stats['running']} running, "
+            f"{job_stats['submitted']} built, {job_stats['deduplicated']} shared, {job_stats['rejected']} turned away."
+        )
+        for kind, latency in job_stats["latency"].items():
+            st.caption(f"{kind} latency: p50 {latency[0.5] * 1000:,.0f} ms, p95 {latency[0.95] * 1000:,.0f} ms")
+        model = st.session_state.get("budget_model")
+        if model is not None:
+            st.caption(f"Recomputed on the last change: {', '.join(model.last_recomputed) or 'nothing'}")
+            with st.expander("Budget graph"):
+                st.dataframe(model.describe().astype({"Value": str}), hide_index=True)